@@ -0,0 +1,7 @@
+"""
+Benchmarks for the FireflyIII Integration
+
+Each module runs on its own, from the repository root:
+
+    python -m benchmarks.objects_memory
+"""
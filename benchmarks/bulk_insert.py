@@ -0,0 +1,69 @@
+"""
+Throughput of the typed bulk insert
+
+Inserts 100k transactions into a FireflyiiiObjectBaseList one by one through
+__setitem__, as the parsers did before, and in one extend_typed call
+"""
+
+import timeit
+from typing import List
+
+from custom_components.fireflyiii_integration.integrations.fireflyiii_objects import (
+    FireflyiiiCurrency,
+    FireflyiiiObjectBaseList,
+    FireflyiiiObjectType,
+    FireflyiiiTransaction,
+)
+
+ITEMS = 100_000
+REPEAT = 5
+
+
+def build() -> List[FireflyiiiTransaction]:
+    """Builds the transactions to insert"""
+
+    currency = FireflyiiiCurrency(id="1", name="Euro", code="EUR")
+    return [
+        FireflyiiiTransaction(
+            id=str(index),
+            description="Transaction",
+            value=index / 100,
+            currency=currency,
+            date=None,
+        )
+        for index in range(ITEMS)
+    ]
+
+
+def per_item(items: List[FireflyiiiTransaction]) -> FireflyiiiObjectBaseList:
+    """Validated insert of each item"""
+
+    container = FireflyiiiObjectBaseList()
+    for item in items:
+        container[FireflyiiiObjectType.TRANSACTIONS] = item
+
+    return container
+
+
+def bulk(items: List[FireflyiiiTransaction]) -> FireflyiiiObjectBaseList:
+    """Typed bulk insert"""
+
+    container = FireflyiiiObjectBaseList()
+    container.extend_typed(FireflyiiiObjectType.TRANSACTIONS, items)
+    return container
+
+
+def main() -> None:
+    """Runs the benchmark"""
+
+    items = build()
+    assert len(per_item(items).transactions) == len(bulk(items).transactions)
+
+    print(f"{ITEMS} transactions, best of {REPEAT}")
+    for name, insert in (("__setitem__", per_item), ("extend_typed", bulk)):
+        seconds = min(timeit.repeat(lambda: insert(items), number=1, repeat=REPEAT))
+        print(f"  {name:12} {seconds * 1000:8.1f} ms {ITEMS / seconds:12,.0f} items/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Event loop lag of the response trim and the aggregation
+
+A ticker sleeps 1 ms in a loop and records how late it wakes up while a
+large response is trimmed and a large transaction table aggregated, inline
+on the loop and offloaded to the executor
+"""
+
+import asyncio
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from custom_components.fireflyiii_integration.integrations.fireflyiii import (
+    FireflyiiiResponseTrim,
+)
+from custom_components.fireflyiii_integration.integrations.fireflyiii_aggregation import (
+    FireflyiiiAggregation,
+)
+from custom_components.fireflyiii_integration.integrations.fireflyiii_offload import (
+    offload,
+)
+from custom_components.fireflyiii_integration.integrations.fireflyiii_table import (
+    FireflyiiiTransactionTable,
+)
+
+TICK = 0.001
+TRIM_ITEMS = 200_000
+TABLE_ROWS = 500_000
+
+START = date(2024, 1, 1)
+
+
+def response() -> Dict[str, Any]:
+    """A decoded list response with TRIM_ITEMS items"""
+    return {
+        "data": [
+            {
+                "type": "accounts",
+                "id": str(index),
+                "attributes": {
+                    "name": f"Account {index}",
+                    "type": "asset",
+                    "notes": "x" * 100,
+                    "iban": "NL00BANK0123456789",
+                },
+                "links": {"self": f"/accounts/{index}"},
+            }
+            for index in range(TRIM_ITEMS)
+        ],
+        "meta": {},
+    }
+
+
+def table() -> FireflyiiiTransactionTable:
+    """A transaction table with TABLE_ROWS splits"""
+
+    rows = FireflyiiiTransactionTable()
+    for index in range(TABLE_ROWS):
+        rows.append_split(
+            {
+                "type": ("withdrawal", "deposit", "transfer")[index % 3],
+                "date": (START + timedelta(days=index % 366)).isoformat(),
+                "amount": str(index % 1000 / 10),
+                "currency_code": "EUR",
+                "source_id": str(index % 50),
+                "destination_id": str(index % 70),
+                "category_id": str(index % 40),
+                "budget_id": str(index % 20),
+            }
+        )
+
+    return rows
+
+
+async def max_lag(
+    func: Callable[..., Any], *args: Any, threshold: Optional[int]
+) -> float:
+    """Longest the ticker was late while func ran, in seconds"""
+
+    loop = asyncio.get_running_loop()
+    lags: List[float] = []
+    running = True
+
+    async def ticker() -> None:
+        while running:
+            started = loop.time()
+            await asyncio.sleep(TICK)
+            lags.append(loop.time() - started - TICK)
+
+    task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(TICK * 10)
+
+    await offload(func, *args, size=1, threshold=threshold)
+
+    running = False
+    await task
+    return max(lags)
+
+
+async def run() -> None:
+    """Measures each stage inline and offloaded"""
+
+    stages = (
+        (
+            f"trim {TRIM_ITEMS} items",
+            FireflyiiiResponseTrim("name", "type"),
+            response(),
+        ),
+        (f"aggregate {TABLE_ROWS} rows", FireflyiiiAggregation.from_table, table()),
+    )
+
+    print(f"Event loop max lag, {TICK * 1000:.0f} ms ticker")
+    for name, func, data in stages:
+        started = time.perf_counter()
+        inline = await max_lag(func, data, threshold=None)
+        seconds = time.perf_counter() - started
+        offloaded = await max_lag(func, data, threshold=0)
+
+        print(f"  {name} ({seconds * 1000:.0f} ms)")
+        print(f"    inline     {inline * 1000:8.1f} ms")
+        print(f"    executor   {offloaded * 1000:8.1f} ms")
+
+
+def main() -> None:
+    """Runs the benchmark"""
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Cost of formatting monetary values
+
+Formats 10k amounts with babel.numbers.format_currency on each value, as
+output_money did before, and with the cached formatter of output_money
+"""
+
+import timeit
+from typing import List
+
+from babel.numbers import format_currency
+
+from custom_components.fireflyiii_integration.integrations.fireflyiii_functions import (
+    output_money,
+)
+from custom_components.fireflyiii_integration.integrations.fireflyiii_objects import (
+    FireflyiiiCurrency,
+)
+
+VALUES = 10_000
+REPEAT = 5
+LOCALE = "pt_PT"
+
+EUR = FireflyiiiCurrency(id="1", name="Euro", code="EUR", symbol="€")
+
+
+def uncached(values: List[float]) -> List[str]:
+    """Locale and pattern parsed on every value"""
+    return [format_currency(value, "EUR", locale=LOCALE) for value in values]
+
+
+def per_value(values: List[float]) -> List[str]:
+    """Cached formatter looked up on every value"""
+    return [output_money(value, EUR, LOCALE) for value in values]
+
+
+def main() -> None:
+    """Runs the benchmark"""
+
+    values = [index * 1.37 - 5000 for index in range(VALUES)]
+    assert uncached(values) == per_value(values)
+
+    print(f"{VALUES} amounts in {LOCALE}, best of {REPEAT}")
+    for name, output in (
+        ("format_currency", uncached),
+        ("output_money", per_value),
+    ):
+        seconds = min(timeit.repeat(lambda: output(values), number=1, repeat=REPEAT))
+        print(f"  {name:17} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
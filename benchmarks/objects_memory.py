@@ -0,0 +1,91 @@
+"""
+Memory of the slotted object model
+
+Builds 100k synthetic transactions with tracemalloc tracing, with the slotted
+FireflyiiiTransaction and with the same fields in a regular dataclass, as
+the object model was before
+"""
+
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, List
+
+from custom_components.fireflyiii_integration.integrations.fireflyiii_objects import (
+    FireflyiiiAccount,
+    FireflyiiiCategory,
+    FireflyiiiCurrency,
+    FireflyiiiTransaction,
+)
+
+TRANSACTIONS = 100_000
+
+# Same fields, with a per instance __dict__
+DictTransaction = make_dataclass(
+    "DictTransaction",
+    [(item.name, item.type) for item in fields(FireflyiiiTransaction)],
+)
+
+
+def build(factory: Callable[..., Any]) -> List[Any]:
+    """Builds the transactions, sharing currency, accounts and categories"""
+
+    currency = FireflyiiiCurrency(id="1", name="Euro", code="EUR", symbol="€")
+    accounts = [
+        FireflyiiiAccount(
+            id=str(index),
+            name=f"Account {index}",
+            type="asset",
+            iban="",
+            currency=currency,
+            balance=0,
+        )
+        for index in range(50)
+    ]
+    categories = [
+        FireflyiiiCategory(id=str(index), name=f"Category {index}", currency=currency)
+        for index in range(40)
+    ]
+    start = datetime(2024, 1, 1)
+
+    return [
+        factory(
+            id=str(index),
+            description="Transaction",
+            value=index / 100,
+            currency=currency,
+            date=start + timedelta(minutes=index),
+            from_account=accounts[index % 50],
+            to_account=accounts[(index + 1) % 50],
+            category=categories[index % 40],
+        )
+        for index in range(TRANSACTIONS)
+    ]
+
+
+def measure(factory: Callable[..., Any]) -> int:
+    """Bytes held by the transactions once built"""
+
+    tracemalloc.start()
+    items = build(factory)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del items
+    return current
+
+
+def main() -> None:
+    """Runs the benchmark"""
+
+    dict_bytes = measure(DictTransaction)
+    slot_bytes = measure(FireflyiiiTransaction)
+
+    print(f"{TRANSACTIONS} transactions")
+    print(f"  dataclass with __dict__ {dict_bytes / 2**20:8.1f} MiB")
+    print(f"  slotted dataclass       {slot_bytes / 2**20:8.1f} MiB")
+    print(f"  saved                   {1 - slot_bytes / dict_bytes:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
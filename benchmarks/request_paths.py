@@ -0,0 +1,126 @@
+"""
+Cost of the request cache hit and of the response decode
+
+The cache hit compares the canonical tuple key with the md5 hash the cache
+used before, and times a whole _request_api call answered from the cache.
+The decode compares the bytes decoder with decoding text through the
+stdlib json, as responses were decoded before
+"""
+
+import asyncio
+import json
+import timeit
+from hashlib import md5
+from typing import Any, Dict, Optional
+
+from custom_components.fireflyiii_integration.integrations.fireflyiii import (
+    JSON_LOADS,
+    TRIM_CATEGORIES,
+    Fireflyiii,
+)
+
+HITS = 100_000
+DECODE_ITEMS = 5_000
+REPEAT = 5
+
+PATH = "/categories"
+PARAMS = {"start": "2024-01-01", "end": "2024-12-31", "page": 3}
+
+
+def md5_key(path: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Cache key as the cache computed it before"""
+    return md5(
+        (
+            md5(path.encode()).hexdigest()
+            + md5(json.dumps(params).encode()).hexdigest()
+        ).encode()
+    ).hexdigest()
+
+
+def payload() -> bytes:
+    """A /transactions page with DECODE_ITEMS splits"""
+
+    return json.dumps(
+        {
+            "data": [
+                {
+                    "type": "transactions",
+                    "id": str(index),
+                    "attributes": {
+                        "transactions": [
+                            {
+                                "type": "withdrawal",
+                                "date": "2024-03-01T12:00:00+00:00",
+                                "amount": "12.340000000000",
+                                "description": f"Transaction {index}",
+                                "currency_code": "EUR",
+                                "source_id": "1",
+                                "destination_id": "2",
+                                "category_id": str(index % 40),
+                                "notes": "x" * 200,
+                                "tags": ["one", "two"],
+                            }
+                        ]
+                    },
+                }
+                for index in range(DECODE_ITEMS)
+            ],
+            "meta": {"pagination": {"total": DECODE_ITEMS, "total_pages": 1}},
+        }
+    ).encode()
+
+
+def best(stmt) -> float:
+    """Best time of REPEAT runs"""
+    return min(timeit.repeat(stmt, number=1, repeat=REPEAT))
+
+
+async def cached_requests(api: Fireflyiii) -> None:
+    """Requests answered from the cache"""
+    for _ in range(HITS):
+        await api._request_api(  # pylint: disable=protected-access
+            path=PATH, params=PARAMS, parser=TRIM_CATEGORIES
+        )
+
+
+def cache_hit() -> None:
+    """Times the key and the cached request"""
+
+    api = Fireflyiii("http://localhost")
+    # pylint: disable=protected-access
+    key = api._request_key(PATH, PARAMS, TRIM_CATEGORIES)
+    api._api_cache[key] = {"data": []}
+
+    md5_seconds = best(lambda: [md5_key(PATH, PARAMS) for _ in range(HITS)])
+    key_seconds = best(
+        lambda: [api._request_key(PATH, PARAMS, TRIM_CATEGORIES) for _ in range(HITS)]
+    )
+    hit_seconds = best(lambda: asyncio.run(cached_requests(api)))
+
+    print(f"Cache hit, {HITS} lookups, best of {REPEAT}")
+    print(f"  md5 key      {md5_seconds / HITS * 1e6:8.2f} us")
+    print(f"  tuple key    {key_seconds / HITS * 1e6:8.2f} us")
+    print(f"  cached call  {hit_seconds / HITS * 1e6:8.2f} us")
+    print(f"  cache hits   {api.stats.cached}, requests {api.stats.requests}")
+
+
+def decode() -> None:
+    """Times the response decode"""
+
+    body = payload()
+    text_seconds = best(lambda: json.loads(body.decode()))
+    bytes_seconds = best(lambda: JSON_LOADS(body))
+
+    print(f"Decode, {len(body) / 2**20:.1f} MiB response, best of {REPEAT}")
+    print(f"  json text    {text_seconds * 1000:8.1f} ms")
+    print(f"  {JSON_LOADS.__module__:12} {bytes_seconds * 1000:8.1f} ms")
+
+
+def main() -> None:
+    """Runs the benchmark"""
+    cache_hit()
+    decode()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,19 @@ import logging
 
 from homeassistant import config_entries, core
 from homeassistant.const import Platform
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import device_registry
-
-from .const import COORDINATOR, DATA, DOMAIN, MANUFACTURER
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    BACKFILL,
+    CATEGORY_STATISTICS,
+    COORDINATOR,
+    DATA,
+    DOMAIN,
+    MANUFACTURER,
+    SERVICE_BACKFILL_BALANCE_HISTORY,
+)
 from .integrations.fireflyiii_config import FireflyiiiConfig
 from .integrations.fireflyiii_coordinator import FireflyiiiCoordinator
 from .integrations.fireflyiii_objects import FireflyiiiAbout
@@ -30,6 +40,18 @@ async def async_setup_entry(
 
     hass.data[DOMAIN][entry.entry_id] = {DATA: hass_data, COORDINATOR: coordinator}
 
+    # Daily spend statistics per category, updated after the refreshes
+    if coordinator.user_data.get_categories:
+        # Loads the recorder statistics api, only when there are categories
+        # pylint: disable=import-outside-toplevel
+        from .integrations.fireflyiii_statistics import FireflyiiiCategoryStatistics
+
+        category_statistics = FireflyiiiCategoryStatistics(hass, coordinator)
+        hass.data[DOMAIN][entry.entry_id][CATEGORY_STATISTICS] = category_statistics
+        entry.async_on_unload(
+            coordinator.async_add_listener(category_statistics.async_schedule_update)
+        )
+
     # Fetch Initial Data
     await coordinator.async_refresh()
 
@@ -71,13 +93,76 @@ async def async_unload_entry(
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         # Remove config entry from domain.
 
-        # pylint: disable=unused-variable
         entry_data = hass.data[DOMAIN].pop(entry.entry_id)
 
+        if BACKFILL in entry_data:
+            entry_data[BACKFILL].async_cancel()
+
+        if CATEGORY_STATISTICS in entry_data:
+            entry_data[CATEGORY_STATISTICS].async_cancel()
+
     return unload_ok
 
 
 # pylint: disable=unused-argument
 async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
     """Disallow configuration via YAML."""
+
+    # voluptuous and config validation only for the service, not at import
+    # pylint: disable=import-outside-toplevel
+    import voluptuous as vol
+    from homeassistant.helpers import config_validation as cv
+
+    backfill_schema = vol.Schema(
+        {
+            vol.Optional("config_entry_id"): cv.string,
+            vol.Required("start_date"): cv.date,
+            vol.Optional("end_date"): cv.date,
+            vol.Optional("restart", default=False): cv.boolean,
+        }
+    )
+
+    async def async_backfill_balance_history(call: core.ServiceCall) -> None:
+        """Backfill the balance history of the accounts into statistics"""
+
+        if "recorder" not in hass.config.components:
+            raise HomeAssistantError("Balance backfill needs the recorder")
+
+        start = call.data["start_date"]
+        end = call.data.get("end_date") or dt_util.now().date()
+        if start > end:
+            raise HomeAssistantError("Balance backfill start is after the end")
+
+        entries = hass.data.get(DOMAIN, {})
+        entry_ids = (
+            [call.data["config_entry_id"]]
+            if "config_entry_id" in call.data
+            else list(entries)
+        )
+
+        for entry_id in entry_ids:
+            if entry_id not in entries:
+                raise HomeAssistantError(f"FireflyIII entry '{entry_id}' not loaded")
+
+            entry_data = entries[entry_id]
+            if BACKFILL not in entry_data:
+                # The recorder statistics api is loaded on the first backfill
+                # pylint: disable=import-outside-toplevel
+                from .integrations.fireflyiii_backfill import (
+                    FireflyiiiBalanceBackfill,
+                )
+
+                entry_data[BACKFILL] = FireflyiiiBalanceBackfill(
+                    hass, entry_data[COORDINATOR]
+                )
+
+            entry_data[BACKFILL].async_start(start, end, call.data["restart"])
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BACKFILL_BALANCE_HISTORY,
+        async_backfill_balance_history,
+        schema=backfill_schema,
+    )
+
     return True
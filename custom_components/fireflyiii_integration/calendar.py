@@ -3,12 +3,14 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime, timedelta
-from typing import Any, List, Optional, cast
+from dataclasses import replace
+from datetime import date, datetime, time, timedelta
+from typing import Any, List, Optional, Tuple, cast
 
 from homeassistant import config_entries, core
 from homeassistant.components.calendar import CalendarEntity, CalendarEvent
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
 
 from .const import (
     COORDINATOR,
@@ -23,11 +25,14 @@ from .integrations.fireflyiii_functions import (
     get_hass_locale,
     output_money,
 )
+from .integrations.fireflyiii_interval_cache import ONE_DAY, FireflyiiiIntervalCache
 from .integrations.fireflyiii_objects import (
     FireflyiiiBill,
     FireflyiiiObjectBaseList,
     FireflyiiiObjectType,
 )
+from .integrations.fireflyiii_scheduler import FireflyiiiPriority, request_priority
+from .integrations.fireflyiii_timeline import FireflyiiiTimeline
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -78,6 +83,19 @@ class FireflyiiiBillCalendarEntity(FireflyiiiEntityBase, CalendarEntity):
 
         self._attr_supported_features: List[str] = []
 
+        # Events of the ranges asked by the frontend, kept until the next
+        # coordinator update. Fetches started before an update belong to an
+        # older generation and don't add to the cache
+        self._events_cache: FireflyiiiIntervalCache[CalendarEvent] = (
+            FireflyiiiIntervalCache()
+        )
+        self._events_generation = 0
+        self._events_bills: Optional[FireflyiiiObjectBaseList] = None
+
+        # Events of the coordinator bills, built on each coordinator update
+        self._timeline: Optional[FireflyiiiTimeline[CalendarEvent]] = None
+        self._pay_timeline: Optional[FireflyiiiTimeline[CalendarEvent]] = None
+
     @property
     def entity_data(self) -> FireflyiiiObjectBaseList:
         """Returns entity data - overide to Type Hints"""
@@ -103,15 +121,90 @@ class FireflyiiiBillCalendarEntity(FireflyiiiEntityBase, CalendarEntity):
     ) -> None:
         pass
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Rebuilds the timelines and drops the cached events"""
+        self._update_timeline()
+        super()._handle_coordinator_update()
+
+    def _update_timeline(
+        self,
+    ) -> Tuple[FireflyiiiTimeline[CalendarEvent], FireflyiiiTimeline[CalendarEvent]]:
+        """
+        Builds the events of the coordinator bills and drops the cached ones,
+        paid dates change even when the bills compare equal. Returns the
+        timelines of all events and of the pay events
+        """
+
+        self._events_cache.clear()
+        self._events_generation += 1
+
+        bills = self.entity_data
+        self._events_bills = bills
+
+        coordinator = cast(FireflyiiiCoordinator, self.coordinator)
+        timerange = coordinator.api.bills_timerange
+
+        start = end = None
+        if timerange and timerange.start_datetime and timerange.end_datetime:
+            start = timerange.start_datetime.date()
+            end = timerange.end_datetime.date()
+
+        timeline = self._timeline = FireflyiiiTimeline(
+            ((event.start, event) for event in self.fireflyiii_events()),
+            start,
+            end,
+        )
+        pay_timeline = self._pay_timeline = FireflyiiiTimeline(
+            (
+                (event.start, event)
+                for event in self.fireflyiii_events(get_pay=True, get_paied=False)
+            ),
+            start,
+            end,
+        )
+
+        return timeline, pay_timeline
+
+    def _timelines(
+        self,
+    ) -> Tuple[FireflyiiiTimeline[CalendarEvent], FireflyiiiTimeline[CalendarEvent]]:
+        """Timelines of all events and of the pay events, built on first use"""
+
+        if self._timeline is None or self._pay_timeline is None:
+            return self._update_timeline()
+
+        return self._timeline, self._pay_timeline
+
     @property
     def event(self) -> CalendarEvent | None:
         """Return the next upcoming event."""
 
-        events = self.fireflyiii_events(get_pay=True, get_paied=False)
-        if events:
-            return events[0]
+        _, pay_timeline = self._timelines()
+        return pay_timeline.next(dt_util.now().date())
+
+    def _expected_bills(
+        self, start: date, end: date
+    ) -> Optional[FireflyiiiObjectBaseList]:
+        """
+        Bills of the coordinator with the pay dates from start to end expanded
+        locally, None if a bill has no recurrence to expand
+        """
+
+        if not self._events_bills:
+            return None
+
+        bill_list = FireflyiiiObjectBaseList(type=FireflyiiiObjectType.BILLS)
+        for bill in self._events_bills.values():
+            if not isinstance(bill, FireflyiiiBill):
+                continue
 
-        return None
+            if bill.active and not bill.start_date:
+                return None
+
+            bill_list.update(replace(bill, pay=bill.expected_pay(start, end), paid=[]))
+
+        return bill_list
 
     def fireflyiii_events(
         self,
@@ -132,14 +225,14 @@ class FireflyiiiBillCalendarEntity(FireflyiiiEntityBase, CalendarEntity):
             if not isinstance(bill, FireflyiiiBill):
                 continue
 
-            if get_pay:
+            if get_pay and bill.pay:
+                pay_value = output_money(bill.value, bill.currency, self.locale)
                 for pay in bill.pay:
                     start = pay.date.replace(hour=0, minute=0, second=0, microsecond=0)
                     end = start + timedelta(hours=24)
 
                     event = CalendarEvent(
-                        # pylint: disable=line-too-long
-                        summary=f"{bill.name} {output_money(bill.value,bill.currency,self.locale)}",
+                        summary=f"{bill.name} {pay_value}",
                         start=start.date(),
                         end=end.date(),
                     )
@@ -168,10 +261,64 @@ class FireflyiiiBillCalendarEntity(FireflyiiiEntityBase, CalendarEntity):
         end_date: datetime,
     ) -> list[CalendarEvent]:
         """Return calendar events within a datetime range."""
-        coordinator = cast(FireflyiiiCoordinator, self.coordinator)
 
-        timerange = dates_to_range(start_date, end_date)
-
-        bills = await coordinator.api.bills(timerange=timerange)
-
-        return self.fireflyiii_events(bills)
+        start = start_date.date()
+        end = end_date.date()
+
+        timeline, _ = self._timelines()
+        if timeline.covers(start, end):
+            return timeline.slice(start, end)
+
+        # The card is waiting on these, they go ahead of the refresh requests.
+        # A coordinator update during the fetch drops it, it's done once more
+        # with the new bills
+        with request_priority(FireflyiiiPriority.INTERACTIVE):
+            for _ in range(2):
+                await self._async_fetch_events(start, end)
+                if not self._events_cache.missing(start, end):
+                    break
+
+        # The calendar card usually moves to the range before or after
+        span = end - start + ONE_DAY
+        for prefetch_start, prefetch_end in (
+            (start - span, start - ONE_DAY),
+            (end + ONE_DAY, end + span),
+        ):
+            if self._events_cache.missing(prefetch_start, prefetch_end):
+                hass.async_create_background_task(
+                    self._async_fetch_events(prefetch_start, prefetch_end),
+                    f"{DOMAIN} bills prefetch {prefetch_start} {prefetch_end}",
+                )
+
+        return self._events_cache.get(start, end)
+
+    async def _async_fetch_events(self, start: date, end: date) -> None:
+        """Fetches the bills of the days from start to end not in cache"""
+        coordinator = cast(FireflyiiiCoordinator, self.coordinator)
+        today = dt_util.now().date()
+        generation = self._events_generation
+
+        for missing_start, missing_end in self._events_cache.missing(start, end):
+            # Future days have nothing paid, their pay dates come from the
+            # recurrence of the bills already known
+            bills = None
+            if missing_start > today:
+                bills = self._expected_bills(missing_start, missing_end)
+
+            if bills is None:
+                timerange = dates_to_range(
+                    datetime.combine(missing_start, time.min),
+                    datetime.combine(missing_end, time.min),
+                )
+
+                bills = await coordinator.api.bills(timerange=timerange)
+
+            # The coordinator updated meanwhile, these bills may be stale
+            if generation != self._events_generation:
+                return
+
+            self._events_cache.add(
+                missing_start,
+                missing_end,
+                ((event.start, event) for event in self.fireflyiii_events(bills)),
+            )
@@ -6,7 +6,8 @@ from typing import Any, Dict, Optional
 from homeassistant.config_entries import ConfigEntry, ConfigFlow, OptionsFlow
 
 from .const import DOMAIN
-from .integrations.fireflyiii_config import FireflyiiiConfig, FireflyiiiConfigSchema
+from .integrations.fireflyiii_config import FireflyiiiConfig
+from .integrations.fireflyiii_config_schema import FireflyiiiConfigSchema
 
 # from homeassistant.core import callback
 
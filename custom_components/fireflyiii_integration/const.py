@@ -23,6 +23,7 @@ from .integrations.fireflyiii_coordinator import FireflyiiiCoordinator
 from .integrations.fireflyiii_objects import (
     FireflyiiiObjectBase,
     FireflyiiiObjectBaseList,
+    FireflyiiiObjectIndex,
     FireflyiiiObjectType,
 )
 
@@ -31,6 +32,10 @@ MANUFACTURER = "FireflyIII"
 
 COORDINATOR = "coordinator"
 DATA = "data"
+BACKFILL = "backfill"
+CATEGORY_STATISTICS = "category_statistics"
+
+SERVICE_BACKFILL_BALANCE_HISTORY = "backfill_balance_history"
 
 STORE_VERSION = "1.0.0"
 STORE_PREFIX = "fireflyiii"
@@ -93,6 +98,28 @@ FIREFLYIII_SENSOR_DESCRIPTIONS: Final[dict[str, SensorEntityDescription]] = {
     ),
 }
 
+# Account Flow Sensors Descriptions, money into and out of an account in the range
+FIREFLYIII_ACCOUNT_FLOW_SENSOR_DESCRIPTIONS: Final[
+    dict[str, SensorEntityDescription]
+] = {
+    "inflow": SensorEntityDescription(
+        key="inflow",
+        translation_key="account_inflow",
+        icon="mdi:cash-plus",
+        device_class=SensorDeviceClass.MONETARY,
+        state_class=SensorStateClass.TOTAL,
+        suggested_display_precision=2,
+    ),
+    "outflow": SensorEntityDescription(
+        key="outflow",
+        translation_key="account_outflow",
+        icon="mdi:cash-minus",
+        device_class=SensorDeviceClass.MONETARY,
+        state_class=SensorStateClass.TOTAL,
+        suggested_display_precision=2,
+    ),
+}
+
 
 # Entity Base
 class FireflyiiiEntityBase(CoordinatorEntity):
@@ -182,6 +209,11 @@ class FireflyiiiEntityBase(CoordinatorEntity):
             return {}
         return self.coordinator.api_data.get(self._type, {})
 
+    @property
+    def api_index(self) -> FireflyiiiObjectIndex:
+        """Return the secondary indexes of the coordinator data"""
+        return self.coordinator.api_data.index
+
     @property
     def object_type(self) -> FireflyiiiObjectType:
         """Returns FireflyIII object type"""
@@ -191,7 +223,12 @@ class FireflyiiiEntityBase(CoordinatorEntity):
     def entity_data(self) -> Union[FireflyiiiObjectBase, FireflyiiiObjectBaseList]:
         """Returns entity data"""
         if self.fireflyiii_id:
-            return self._entity_data.get(self.fireflyiii_id, {})
+            entity_data = self.coordinator.api_data.lookup(
+                self._type, self.fireflyiii_id
+            )
+            if entity_data is None:
+                return FireflyiiiObjectBaseList()
+            return entity_data
         else:
             return self._entity_data
 
@@ -0,0 +1,48 @@
+"""FireflyIII Integration Diagnostics"""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import Any, Dict
+
+from homeassistant import config_entries, core
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_ACCESS_TOKEN, CONF_URL
+
+from .const import COORDINATOR, DOMAIN
+from .integrations.fireflyiii_coordinator import FireflyiiiCoordinator
+
+TO_REDACT = {CONF_ACCESS_TOKEN, CONF_URL}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: core.HomeAssistant, entry: config_entries.ConfigEntry
+) -> Dict[str, Any]:
+    """Diagnostics of a config entry, the api counters and the slow sections"""
+
+    coordinator: FireflyiiiCoordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
+    api = coordinator.api
+
+    refresh = None
+    plan = coordinator.last_refresh_plan
+    if plan is not None:
+        refresh = {
+            "critical_path": [
+                {"node": node.name, "seconds": round(node.duration, 4)}
+                for node in plan.critical_path
+            ],
+            "cancelled": plan.cancelled,
+        }
+
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "options": async_redact_data(dict(entry.options), TO_REDACT),
+        "requests": asdict(api.stats),
+        "scheduler": {
+            "active": api.scheduler.active,
+            "waiting": api.scheduler.waiting,
+        },
+        "offload": {"bytes": api.offload_bytes, "rows": api.offload_rows},
+        "blocking": api.blocking.as_dict(),
+        "refresh": refresh,
+    }
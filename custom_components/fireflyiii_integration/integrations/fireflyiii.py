@@ -1,11 +1,26 @@
 """FireflyIII Integration API Access Class"""
 
+from __future__ import annotations
+
+import asyncio
 import json
 import logging
+import time
+from contextlib import asynccontextmanager
 from copy import deepcopy
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from hashlib import md5
-from typing import Any, Dict, List, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    ContextManager,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 
 import aiohttp
 from aiohttp.client_exceptions import (
@@ -13,11 +28,12 @@ from aiohttp.client_exceptions import (
     ContentTypeError,
     ServerTimeoutError,
 )
-from datetimerange import DateTimeRange
 
+from .fireflyiii_blocking import FireflyiiiBlockingMonitor
 from .fireflyiii_objects import (
     FireflyiiiAbout,
     FireflyiiiAccount,
+    FireflyiiiBalanceHistory,
     FireflyiiiBill,
     FireflyiiiBillPayment,
     FireflyiiiBudget,
@@ -29,9 +45,179 @@ from .fireflyiii_objects import (
     FireflyiiiPreferences,
     FireflyiiiTransaction,
 )
+from .fireflyiii_offload import (
+    OFFLOAD_MIN_BYTES,
+    OFFLOAD_MIN_ROWS,
+    offload,
+    should_offload,
+)
+from .fireflyiii_query import (
+    ACCOUNTS_FILTERS,
+    AUTOCOMPLETE_ACCOUNTS_FILTERS,
+    TRANSACTIONS_FILTERS,
+    FireflyiiiQuery,
+    account_type_names,
+)
+from .fireflyiii_retry import (
+    REQUEST_DEADLINE,
+    RETRY_IDEMPOTENT,
+    RETRY_NONE,
+    RETRY_STATUSES,
+    FireflyiiiRateLimit,
+    FireflyiiiRetryPolicy,
+    deadline_remaining,
+    request_deadline,
+    retry_after_seconds,
+    within_deadline,
+)
+from .fireflyiii_scheduler import (
+    REQUEST_PRIORITY,
+    FireflyiiiPriority,
+    FireflyiiiRequestScheduler,
+    request_priority,
+    request_scheduler,
+)
+from .fireflyiii_stream import FireflyiiiJsonItemStream
+
+try:
+    # Home Assistant json_loads is orjson, decoding bytes without a text copy
+    from homeassistant.util.json import json_loads as JSON_LOADS
+except ImportError:
+    try:
+        from orjson import loads as JSON_LOADS
+    except ImportError:
+        JSON_LOADS = json.loads
+
+if TYPE_CHECKING:
+    from datetimerange import DateTimeRange
+
+    from .fireflyiii_aggregation import FireflyiiiAggregation
+    from .fireflyiii_table import FireflyiiiTransactionTable
 
 _LOGGER = logging.getLogger(__name__)
 
+# Currencies rarely change, the registry is only reloaded after this time
+CURRENCIES_TTL = timedelta(hours=24)
+
+# Size of the chunks read from streamed list responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Transactions of a range are downloaded in pages of this size
+TRANSACTIONS_PAGE_SIZE = 500
+
+
+class FireflyiiiResponseTrim:
+    """
+    Trims a API response to the attributes used from its data items
+
+    Used as response parser, so the cache holds only the used fields and the
+    raw payload (notes, meta, links...) is dropped as soon as it's decoded
+    """
+
+    __slots__ = ("_keys",)
+
+    def __init__(self, *keys: str) -> None:
+        self._keys = keys
+
+    def _trim_item(self, item: Any) -> Any:
+        if not isinstance(item, dict):
+            return item
+
+        attributes = item.get("attributes")
+        if not isinstance(attributes, dict):
+            return {"id": item.get("id")}
+
+        return {
+            "id": item.get("id"),
+            "attributes": {
+                key: attributes[key] for key in self._keys if key in attributes
+            },
+        }
+
+    def __call__(self, message: Any) -> Any:
+        if not isinstance(message, dict) or "data" not in message:
+            return message
+
+        data = message["data"]
+        if isinstance(data, list):
+            return {"data": [self._trim_item(item) for item in data]}
+
+        return {"data": self._trim_item(data)}
+
+
+TRIM_ACCOUNTS = FireflyiiiResponseTrim("type")
+TRIM_BILLS = FireflyiiiResponseTrim(
+    "name",
+    "amount_min",
+    "amount_max",
+    "currency_code",
+    "pay_dates",
+    "paid_dates",
+    "date",
+    "end_date",
+    "repeat_freq",
+    "skip",
+    "active",
+)
+TRIM_BUDGETS = FireflyiiiResponseTrim("name", "spent")
+TRIM_BUDGET_LIMITS = FireflyiiiResponseTrim("amount", "start", "end")
+TRIM_CATEGORIES = FireflyiiiResponseTrim("name")
+TRIM_CATEGORY = FireflyiiiResponseTrim("name", "current_balance", "spent", "earned")
+TRIM_CURRENCIES = FireflyiiiResponseTrim(
+    "code", "name", "symbol", "enabled", "default", "decimal_places"
+)
+TRIM_PIGGY_BANKS = FireflyiiiResponseTrim(
+    "name",
+    "account_id",
+    "target_amount",
+    "percentage",
+    "current_amount",
+    "left_to_save",
+)
+
+
+@dataclass(slots=True)
+class FireflyiiiRequestStats:
+    """Counters of the FireflyIII api requests"""
+
+    requests: int = 0
+    cached: int = 0
+    coalesced: int = 0
+    retries: int = 0
+    offloaded: int = 0
+
+
+@dataclass(slots=True)
+class FireflyiiiStreamAttempt:
+    """Outcome of a streamed request, to decide if it's retried"""
+
+    items: int = 0
+    transient: bool = False
+    retry_after: Optional[float] = None
+
+
+@dataclass(slots=True, frozen=True)
+class FireflyiiiInflightRequest:
+    """A shared GET running, with the priority and deadline it was sent with"""
+
+    future: asyncio.Future
+    priority: FireflyiiiPriority
+    deadline: Optional[float]
+
+    def serves(self, priority: FireflyiiiPriority, deadline: Optional[float]) -> bool:
+        """
+        Can a caller wait for this request, it isn't queued behind callers of
+        lower priority nor given up before the caller deadline
+        """
+
+        if priority < self.priority:
+            return False
+
+        if self.deadline is None:
+            return True
+
+        return deadline is not None and deadline <= self.deadline
+
 
 class Fireflyiii:
     """Api Access class"""
@@ -42,8 +228,14 @@ class Fireflyiii:
         access_token=None,
         timerange: Optional[DateTimeRange] = None,
         verify_certificates=False,
+        json_loads: Optional[Callable[[bytes], Any]] = None,
+        offload_bytes: Optional[int] = OFFLOAD_MIN_BYTES,
+        offload_rows: Optional[int] = OFFLOAD_MIN_ROWS,
     ) -> None:
         self._api = "/api/v1"
+        self._json_loads: Callable[[bytes], Any] = (
+            json_loads if json_loads else JSON_LOADS
+        )
         self._host = host
         self._access_token = access_token
         self._verify_certificates = verify_certificates
@@ -51,12 +243,101 @@ class Fireflyiii:
         self._preferences: FireflyiiiPreferences = FireflyiiiPreferences()
         self._timerange: Optional[DateTimeRange] = timerange
         self._default_currency: Optional[FireflyiiiCurrency] = None
+        self._currencies: Dict[str, FireflyiiiCurrency] = {}
+        self._currencies_expire: Optional[datetime] = None
+        self._inflight: Dict[Tuple, FireflyiiiInflightRequest] = {}
+        self.stats = FireflyiiiRequestStats()
+        self._rate_limit = FireflyiiiRateLimit()
+        self._scheduler = request_scheduler(host)
+        # Inputs from these sizes are processed in the executor, None never
+        self.offload_bytes = offload_bytes
+        self.offload_rows = offload_rows
+        self.blocking = FireflyiiiBlockingMonitor()
         self.clear_cache()
 
     def clear_cache(self):
         """Clears cache"""
         self._api_cache = {}
 
+    def request_deadline(self, seconds: Optional[float]) -> ContextManager[None]:
+        """
+        Context manager giving the requests of the block, and of the tasks it
+        creates, seconds from now. They aren't retried past it and get what's
+        left of it as timeout. None runs the block without deadline
+        """
+        return request_deadline(seconds)
+
+    def deadline_remaining(self) -> Optional[float]:
+        """Seconds left to the deadline of the current task, None without one"""
+        return deadline_remaining()
+
+    def request_priority(self, priority: FireflyiiiPriority) -> ContextManager[None]:
+        """
+        Context manager sending the requests of the block with the priority,
+        interactive requests are served ahead of refresh and backfill ones
+        """
+        return request_priority(priority)
+
+    @asynccontextmanager
+    async def _request_slot(self) -> AsyncIterator[None]:
+        """
+        Scheduler slot to send a request, taken after the rate limit wait. A
+        pause asked by the server while queued is waited with the slot freed
+        """
+
+        await self._rate_limit.wait()
+
+        while True:
+            async with self._scheduler.slot():
+                paused = self._rate_limit.paused()
+                if paused <= 0 or not within_deadline(paused):
+                    yield
+                    return
+
+            await asyncio.sleep(paused)
+
+    def _request_timeout(self, timeout: float, path: str) -> Optional[float]:
+        """
+        Timeout of a request, bounded by what's left of the deadline. None
+        when the deadline has passed and the request shouldn't be sent
+        """
+
+        remaining = deadline_remaining()
+        if remaining is None:
+            return timeout
+
+        if remaining <= 0:
+            _LOGGER.warning(
+                "Skiping FireflyIII api '%s', refresh deadline has passed", path
+            )
+            return None
+
+        return min(timeout, remaining)
+
+    async def _offload(
+        self,
+        stage: str,
+        func: Callable[..., Any],
+        *args: Any,
+        size: int,
+        threshold: Optional[int],
+    ) -> Any:
+        """
+        Calls func, in the executor when size reaches the threshold. Inline
+        calls are timed as a section of the stage
+        """
+        if should_offload(size, threshold):
+            self.stats.offloaded += 1
+            return await offload(func, *args, size=size, threshold=threshold)
+
+        with self.blocking.section(stage, size):
+            return func(*args)
+
+    @property
+    def scheduler(self) -> FireflyiiiRequestScheduler:
+        """Request scheduler shared with the other api instances of the host"""
+        return self._scheduler
+
     def _set_max_limit(self, params: dict):
         """Sets max limits to avoid paging"""
         if "limit" not in params:
@@ -118,17 +399,76 @@ class Fireflyiii:
 
         attributes = default_currency["data"].get("attributes", {})
 
-        default_currency = FireflyiiiCurrency(
-            id=attributes.get("id", ""),
-            name=attributes.get("name", ""),
-            code=attributes.get("code", ""),
-            symbol=attributes.get("symbol", ""),
-            enabled=attributes.get("enabled", True),
-            decimal_places=attributes.get("decimal_places", 2),
+        default_currency = self._register_currency(
+            default_currency["data"].get("id", ""), attributes
         )
         self._default_currency = default_currency
         return default_currency
 
+    def _register_currency(
+        self, currency_id: str, attributes: Dict[str, Any]
+    ) -> FireflyiiiCurrency:
+        """Adds or updates a currency in the registry, keeping the shared instance"""
+
+        code = attributes.get("code", "")
+        currency = self._currencies.get(code)
+
+        if currency is None:
+            currency = FireflyiiiCurrency(id=currency_id, name="", code=code)
+            self._currencies[code] = currency
+
+        currency.id = attributes.get("id", currency_id)
+        currency.name = attributes.get("name", "")
+        currency.symbol = attributes.get("symbol", "")
+        currency.enabled = attributes.get("enabled", True)
+        currency.default = attributes.get("default", False)
+        currency.decimal_places = attributes.get("decimal_places", 2)
+
+        return currency
+
+    async def _load_currencies(self) -> Dict[str, FireflyiiiCurrency]:
+        """Loads the currency registry from the server, once per CURRENCIES_TTL"""
+
+        if self._currencies_expire and datetime.now() < self._currencies_expire:
+            return self._currencies
+
+        params: dict = {}
+        self._set_max_limit(params)
+
+        currencies = await self._request_api(
+            "GET", "/currencies", params, parser=TRIM_CURRENCIES
+        )
+        if not "data" in currencies:
+            _LOGGER.error(
+                "Invalid response from server on currencies, "
+                + "expected JSON data response: '%s'",
+                currencies,
+            )
+            return self._currencies
+
+        for currency in currencies["data"]:
+            attributes = currency.get("attributes")
+            if not attributes or not attributes.get("code"):
+                continue
+
+            self._register_currency(currency.get("id", ""), attributes)
+
+        self._currencies_expire = datetime.now() + CURRENCIES_TTL
+        return self._currencies
+
+    def _currency(self, code: Optional[str]) -> FireflyiiiCurrency:
+        """Returns the shared currency instance for a currency code"""
+
+        code = code if code else ""
+
+        currency = self._currencies.get(code)
+        if currency is None:
+            # Unknown to the registry, it gets completed on the next load
+            currency = FireflyiiiCurrency(id="0", name=code, code=code)
+            self._currencies[code] = currency
+
+        return currency
+
     @property
     async def start_year(self) -> str:
         """Get FireflyIII start of year"""
@@ -189,7 +529,16 @@ class Fireflyiii:
 
         account_list = FireflyiiiObjectBaseList(type=FireflyiiiObjectType.ACCOUNTS)
 
-        accounts = await self._request_api("GET", "/autocomplete/accounts")
+        fireflyiii_config = ffconfig()
+
+        # The server only sends the types asked, the names are still checked
+        # as a server may not know the filter
+        query = FireflyiiiQuery(server_filters=AUTOCOMPLETE_ACCOUNTS_FILTERS).where(
+            "type", account_type_names(fireflyiii_config.get_account_types)
+        )
+        params = query.requests()[0]
+
+        accounts = await self._request_api("GET", "/autocomplete/accounts", params)
         if not isinstance(accounts, list):
             _LOGGER.error(
                 "Invalid response from server on accounts basic list, "
@@ -198,7 +547,7 @@ class Fireflyiii:
             )
             return account_list
 
-        fireflyiii_config = ffconfig()
+        await self._load_currencies()
 
         for account in accounts:
             account_type = account.get("type", "")
@@ -214,7 +563,7 @@ class Fireflyiii:
                 name=account.get("name_with_balance", ""),
                 type=account.get("type", ""),
                 iban="",
-                currency=account.get("currency_code", ""),
+                currency=self._currency(account.get("currency_code")),
                 balance=0,
                 balance_beginning=0,
             )
@@ -224,25 +573,50 @@ class Fireflyiii:
         return account_list
 
     async def accounts(
-        self, types: Optional[List[str]] = None, ids: Optional[List[str]] = None
+        self,
+        types: Optional[List[str]] = None,
+        ids: Optional[List[str]] = None,
+        aggregation: Optional[FireflyiiiAggregation] = None,
     ) -> FireflyiiiObjectBaseList:
-        """Get FireflyIII Accounts"""
+        """
+        Get FireflyIII Accounts
+
+        With an aggregation of the range only the end state of each account
+        is requested, the beginning balance is derived from the account flows
+        """
 
         _LOGGER.debug("Updating FireflyIII accounts")
 
         account_list = FireflyiiiObjectBaseList(type=FireflyiiiObjectType.ACCOUNTS)
 
-        params: dict = {}
-        self._set_max_limit(params)
-
-        accounts = await self._request_api("GET", "/accounts", params)
-        if not "data" in accounts:
-            _LOGGER.error(
-                "Invalid response from server on accounts, "
-                + "expected JSON data response: '%s'",
-                accounts,
+        if ids:
+            # Each account is requested by id for its state, no list needed
+            account_ids = list(dict.fromkeys(ids))
+        else:
+            account_ids = []
+            query = FireflyiiiQuery(server_filters=ACCOUNTS_FILTERS).where(
+                "type", types
             )
-            return account_list
+            for params in query.requests():
+                self._set_max_limit(params)
+
+                accounts = await self._request_api(
+                    "GET", "/accounts", params, parser=TRIM_ACCOUNTS
+                )
+                if not "data" in accounts:
+                    _LOGGER.error(
+                        "Invalid response from server on accounts, "
+                        + "expected JSON data response: '%s'",
+                        accounts,
+                    )
+                    return account_list
+
+                for account in accounts["data"]:
+                    if account.get("id", 0) == 0 or "attributes" not in account:
+                        continue
+
+                    if query.matches(account):
+                        account_ids.append(account["id"])
 
         # // Get Account State at the end of the timerange
         date_range = {}
@@ -263,89 +637,101 @@ class Fireflyiii:
             ).strftime("%Y-%m-%d")
             date_range["end_state"] = datetime.today().strftime("%Y-%m-%d")
 
-        for account in accounts["data"]:
-            account_id = account.get("id", 0)
+        if aggregation:
+            del date_range["start_state"]
 
-            if account_id == 0:
-                continue
+        await self._load_currencies()
 
-            if "attributes" not in account:
-                continue
-
-            if types and account.get("attributes", {}).get("type") not in types:
-                continue
-
-            if ids and account.get("id", "") not in ids:
-                continue
-
-            data = {}
+        for account_id in account_ids:
+            states: Dict[str, FireflyiiiAccount] = {}
 
             # Get Account to Start And End of the range
             for range_key, dt_range in date_range.items():
                 path = f"/accounts/{account_id}"
 
                 param = {"date": dt_range}
-                account_obj = await self._request_api("GET", path, param)
-                if not account_obj or "data" not in account_obj:
+                account_state = await self._request_api(
+                    "GET", path, param, parser=self._parse_account
+                )
+                if not account_state:
                     _LOGGER.error(
                         "Invalid response from server on accounts for id %s, "
-                        + "expected JSON data response: '%s'",
+                        + "expected JSON data response",
                         account_id,
-                        accounts,
                     )
                     continue
 
-                data[range_key] = account_obj["data"]
+                states[range_key] = account_state
 
-            start_state = data.get("start_state", {})
-            end_state = data.get("end_state", {})
+            end_state = states.get("end_state", states.get("start_state"))
+            start_state = states.get("start_state", end_state)
 
-            start_attibutes = start_state.get("attributes", {})
-            end_attributes = end_state.get("attributes", {})
+            if not start_state or not end_state:
+                continue
 
-            if start_attibutes and end_attributes:
-                pass
-            elif not start_attibutes and end_attributes:
-                start_attibutes = end_attributes
-            elif start_attibutes and not end_attributes:
-                end_attributes = start_attibutes
-            else:
+            # Accounts by id aren't listed, their type is filtered here
+            if ids and types and end_state.type not in types:
                 continue
 
-            try:
-                balance = float(end_attributes.get("current_balance", 0))
-            except ValueError:
-                _LOGGER.error(
-                    "Invalid response from server on 'current_balance', "
-                    + "expected float': '%s'",
-                    end_attributes,
+            balance_beginning = start_state.balance
+            inflow = None
+            outflow = None
+            if aggregation:
+                inflow = aggregation.account_inflow_in(end_state.id, end_state.currency)
+                outflow = aggregation.account_outflow_in(
+                    end_state.id, end_state.currency
                 )
-                balance = float(0)
-
-            try:
-                balance_beginning = float(start_attibutes.get("current_balance", 0))
-            except ValueError:
-                _LOGGER.error(
-                    "Invalid response from server on 'current_balance', "
-                    + "expected float': '%s'",
-                    end_attributes,
+                balance_beginning = round(
+                    end_state.balance - (inflow - outflow),
+                    end_state.currency.decimal_places,
                 )
-                balance_beginning = float(0)
 
             account_obj = FireflyiiiAccount(
-                id=end_attributes.get("id", account_id),
-                name=end_attributes.get("name", ""),
-                type=end_attributes.get("type", ""),
-                iban=end_attributes.get("iban", ""),
-                currency=end_attributes.get("currency_code", ""),
-                balance=balance,
+                id=end_state.id,
+                name=end_state.name,
+                type=end_state.type,
+                iban=end_state.iban,
+                currency=end_state.currency,
+                balance=end_state.balance,
                 balance_beginning=balance_beginning,
+                inflow=inflow,
+                outflow=outflow,
             )
 
             account_list.update(account_obj)
 
         return account_list
 
+    def _parse_account(self, message: Any) -> Optional[FireflyiiiAccount]:
+        """Parses a account response, balance is the balance at the requested date"""
+
+        if not isinstance(message, dict) or not isinstance(message.get("data"), dict):
+            return None
+
+        account_id = message["data"].get("id", 0)
+        attributes = message["data"].get("attributes", {})
+        if not account_id or not attributes:
+            return None
+
+        try:
+            balance = float(attributes.get("current_balance", 0))
+        except ValueError:
+            _LOGGER.error(
+                "Invalid response from server on 'current_balance', "
+                + "expected float': '%s'",
+                attributes.get("current_balance"),
+            )
+            balance = float(0)
+
+        return FireflyiiiAccount(
+            id=account_id,
+            name=attributes.get("name", ""),
+            type=attributes.get("type", ""),
+            iban=attributes.get("iban", "") or "",
+            currency=self._currency(attributes.get("currency_code")),
+            balance=balance,
+        )
+
     @property
     async def categories_autocomplete(
         self,
@@ -356,26 +742,40 @@ class Fireflyiii:
         if not isinstance(categories, list):
             return FireflyiiiObjectBaseList()
 
+        default_currency = await self.default_currency
+
         category_list = FireflyiiiObjectBaseList(type=FireflyiiiObjectType.CATEGORIES)
         for category in categories:
             category_obj = FireflyiiiCategory(
                 id=category.get("id", ""),
                 name=category.get("name", ""),
-                currency=await self.default_currency,
+                currency=default_currency,
             )
 
             category_list.update(category_obj)
 
         return category_list
 
-    async def categories(self, ids=None, currency=None) -> FireflyiiiObjectBaseList:
-        """Get FireflyIII categories"""
+    async def categories(
+        self,
+        ids=None,
+        currency=None,
+        aggregation: Optional[FireflyiiiAggregation] = None,
+    ) -> FireflyiiiObjectBaseList:
+        """
+        Get FireflyIII categories
+
+        With an aggregation of the range the totals are taken from it, instead
+        of requesting each category
+        """
         _LOGGER.debug("Updating FireflyIII categories")
 
         params: dict = {}
         self._set_max_limit(params)
 
-        categories = await self._request_api("GET", "/categories", params)
+        categories = await self._request_api(
+            "GET", "/categories", params, parser=TRIM_CATEGORIES
+        )
         if not "data" in categories:
             _LOGGER.error(
                 "Invalid response from server on categories, "
@@ -395,6 +795,8 @@ class Fireflyiii:
                 "end": self._timerange.end_datetime.strftime("%Y-%m-%d"),
             }
 
+        get_currency = await self._resolve_currency(currency)
+
         category_list = FireflyiiiObjectBaseList()
 
         for category in categories["data"]:
@@ -405,8 +807,24 @@ class Fireflyiii:
             if ids and category_id not in ids:
                 continue
 
+            if aggregation:
+                category_list.update(
+                    FireflyiiiCategory(
+                        id=category_id,
+                        name=category.get("attributes", {}).get("name", ""),
+                        spent=aggregation.category_spent_in(category_id, get_currency),
+                        earned=aggregation.category_earned_in(
+                            category_id, get_currency
+                        ),
+                        currency=get_currency,
+                    )
+                )
+                continue
+
             path = f"/categories/{category_id}"
-            category_obj = await self._request_api("GET", path, date_range)
+            category_obj = await self._request_api(
+                "GET", path, date_range, parser=TRIM_CATEGORY
+            )
             if category_obj and "data" in category_obj:
                 attributes = category_obj["data"].get("attributes", {})
                 if not attributes:
@@ -423,11 +841,6 @@ class Fireflyiii:
             spent_get = [{}] if len(spend) == 0 else spend
             earned_get = [{}] if len(earned) == 0 else earned
 
-            if currency:
-                get_currency = currency
-            else:
-                get_currency = await self.default_currency
-
             try:
                 spent_currency = sum(
                     float(s.get("sum", 0))
@@ -464,36 +877,15 @@ class Fireflyiii:
 
         currency_list = FireflyiiiObjectBaseList(type=FireflyiiiObjectType.CURRENCIES)
 
-        currencies = await self._request_api("GET", "/currencies")
-        if not "data" in currencies:
-            _LOGGER.error(
-                "Invalid response from server on currencies, "
-                + "expected JSON data response: '%s'",
-                currencies,
-            )
-            return currency_list
+        registry = await self._load_currencies()
 
-        for currency in currencies["data"]:
-            currency_id = currency.get("id", 0)
-            if currency_id == 0:
+        for currency_obj in registry.values():
+            if not currency_obj.id or currency_obj.id == "0":
                 continue
 
-            if ids and currency_id not in ids:
+            if ids and currency_obj.id not in ids:
                 continue
 
-            attributes = currency.get("attributes")
-            if not attributes:
-                continue
-
-            currency_obj = FireflyiiiCurrency(
-                id=attributes.get("id", currency_id),
-                name=attributes.get("name", ""),
-                code=attributes.get("code", ""),
-                default=attributes.get("default", False),
-                enabled=attributes.get("enabled", False),
-                symbol=attributes.get("symbol", False),
-            )
-
             if (
                 enabled is not None
                 and enabled is True
@@ -511,8 +903,26 @@ class Fireflyiii:
 
         return currency_list
 
-    async def piggy_banks(self, ids=None) -> FireflyiiiObjectBaseList:
-        """Get FireflyIII Piggy Banks"""
+    async def _resolve_currency(
+        self, currency: Optional[str | FireflyiiiCurrency] = None
+    ) -> FireflyiiiCurrency:
+        """Returns the registry currency for a code, or the default currency"""
+
+        if not currency:
+            return await self.default_currency
+
+        await self._load_currencies()
+        return self._currency(str(currency))
+
+    async def piggy_banks(
+        self, ids=None, accounts: Optional[FireflyiiiObjectBaseList] = None
+    ) -> FireflyiiiObjectBaseList:
+        """
+        Get FireflyIII Piggy Banks
+
+        The accounts of the piggy banks are taken from accounts when there,
+        the others are requested once each
+        """
 
         _LOGGER.debug("Updating FireflyIII piggy banks")
 
@@ -523,7 +933,9 @@ class Fireflyiii:
         params: dict = {}
         self._set_max_limit(params)
 
-        piggy_banks = await self._request_api("GET", "/piggy-banks", params)
+        piggy_banks = await self._request_api(
+            "GET", "/piggy-banks", params, parser=TRIM_PIGGY_BANKS
+        )
         if not "data" in piggy_banks:
             _LOGGER.error(
                 "Invalid response from server on piggy banks, "
@@ -532,6 +944,13 @@ class Fireflyiii:
             )
             return piggy_bank_list
 
+        # Several piggy banks can share an account
+        piggy_accounts: Dict[str, Any] = (
+            dict(accounts.data.get(FireflyiiiObjectType.ACCOUNTS, {}))
+            if accounts
+            else {}
+        )
+
         for piggy_bank in piggy_banks["data"]:
             piggy_bank_id = piggy_bank.get("id", 0)
             if piggy_bank_id == 0:
@@ -548,12 +967,13 @@ class Fireflyiii:
             if not account_id:
                 continue
 
-            piggy_account_list = await self.accounts(ids=[account_id])
-            if not piggy_account_list:
-                continue
+            if account_id not in piggy_accounts:
+                piggy_account_list = await self.accounts(ids=[account_id])
+                piggy_accounts[account_id] = piggy_account_list.lookup(
+                    FireflyiiiObjectType.ACCOUNTS, account_id
+                )
 
-            account_id = next(iter(piggy_account_list))
-            piggy_account = piggy_account_list.get(account_id, None)
+            piggy_account = piggy_accounts[account_id]
 
             if not isinstance(piggy_account, FireflyiiiAccount):
                 continue
@@ -573,8 +993,18 @@ class Fireflyiii:
 
         return piggy_bank_list
 
-    async def budgets(self, ids=None, currency=None) -> FireflyiiiObjectBaseList:
-        """Get FireflyIII Budgets"""
+    async def budgets(
+        self,
+        ids=None,
+        currency=None,
+        aggregation: Optional[FireflyiiiAggregation] = None,
+    ) -> FireflyiiiObjectBaseList:
+        """
+        Get FireflyIII Budgets
+
+        With an aggregation of the range the spent is taken from it, only the
+        limits are requested for each budget
+        """
 
         _LOGGER.debug("Updating FireflyIII budgets")
 
@@ -592,7 +1022,9 @@ class Fireflyiii:
             }
 
         self._set_max_limit(params)
-        budgets = await self._request_api("GET", "/budgets", params)
+        budgets = await self._request_api(
+            "GET", "/budgets", params, parser=TRIM_BUDGETS
+        )
         if not "data" in budgets:
             _LOGGER.error(
                 "Invalid response from server on budgets, "
@@ -601,6 +1033,8 @@ class Fireflyiii:
             )
             return budgets_list
 
+        get_currency = await self._resolve_currency(currency)
+
         for budget in budgets["data"]:
             budget_id = budget.get("id", 0)
             if budget_id == 0:
@@ -614,7 +1048,7 @@ class Fireflyiii:
                 continue
 
             budget_limits = await self._request_api(
-                "GET", f"/budgets/{budget_id}/limits", params
+                "GET", f"/budgets/{budget_id}/limits", params, parser=TRIM_BUDGET_LIMITS
             )
             if not budget_limits or not "data" in budget_limits or len(budget_limits["data"]) < 1:
                 budget_limit = {}
@@ -630,19 +1064,17 @@ class Fireflyiii:
                 start_limit = None
                 end_limit = None
 
-            if currency:
-                get_currency = currency
+            if aggregation:
+                spent_currency = aggregation.budget_spent_in(budget_id, get_currency)
             else:
-                get_currency = await self.default_currency
-
-            try:
-                spent_currency = sum(
-                    float(s.get("sum", 0))
-                    for s in attributes["spent"]
-                    if s.get("currency_code", "") == str(get_currency)
-                )
-            except ValueError:
-                spent_currency = 0
+                try:
+                    spent_currency = sum(
+                        float(s.get("sum", 0))
+                        for s in attributes.get("spent", [])
+                        if s.get("currency_code", "") == str(get_currency)
+                    )
+                except ValueError:
+                    spent_currency = 0
 
             budget_obj = FireflyiiiBudget(
                 id=attributes.get("id", budget_id),
@@ -658,6 +1090,25 @@ class Fireflyiii:
 
         return budgets_list
 
+    @property
+    def bills_timerange(self) -> Optional[DateTimeRange]:
+        """Range of the bills, when not given"""
+
+        if not self._timerange:
+            return None
+
+        # The bills object is special, it uses de time of the range up and down
+        # to pull the bills
+        get_timerange = deepcopy(self._timerange)
+        delta = self._timerange.get_timedelta_second()
+        end_date = self._timerange.end_datetime
+        if end_date:
+            end_date = end_date + timedelta(seconds=delta)
+            end_date = end_date.replace(hour=23, minute=59, second=59, microsecond=59)
+            get_timerange.set_end_datetime(end_date)
+
+        return get_timerange
+
     async def bills(
         self, ids=None, timerange: Optional[DateTimeRange] = None
     ) -> FireflyiiiObjectBaseList:
@@ -665,22 +1116,7 @@ class Fireflyiii:
 
         _LOGGER.debug("Updating FireflyIII bills")
 
-        get_timerange: Optional[DateTimeRange] = None
-
-        if timerange:
-            get_timerange = timerange
-        elif self._timerange:
-            # The bills object is special, it uses de time of the range up and down
-            # to pull the bills
-            get_timerange = deepcopy(self._timerange)
-            delta = self._timerange.get_timedelta_second()
-            end_date = self._timerange.end_datetime
-            if end_date:
-                end_date = end_date + timedelta(seconds=delta)
-                end_date = end_date.replace(
-                    hour=23, minute=59, second=59, microsecond=59
-                )
-                get_timerange.set_end_datetime(end_date)
+        get_timerange = timerange if timerange else self.bills_timerange
 
         params = {}
         if (
@@ -697,7 +1133,7 @@ class Fireflyiii:
 
         self._set_max_limit(params)
 
-        bills = await self._request_api("GET", "/bills", params)
+        bills = await self._request_api("GET", "/bills", params, parser=TRIM_BILLS)
         if not "data" in bills:
             _LOGGER.error(
                 "Invalid response from server on bills, "
@@ -706,6 +1142,8 @@ class Fireflyiii:
             )
             return bill_list
 
+        await self._load_currencies()
+
         for bill in bills["data"]:
             bill_id = bill.get("id", 0)
             if bill_id == 0:
@@ -762,14 +1200,34 @@ class Fireflyiii:
             except ValueError:
                 value_max = 0
 
+            try:
+                start_date = datetime.fromisoformat(attributes.get("date", ""))
+            except (TypeError, ValueError):
+                start_date = None
+
+            try:
+                end_date = datetime.fromisoformat(attributes.get("end_date", ""))
+            except (TypeError, ValueError):
+                end_date = None
+
+            try:
+                skip = int(attributes.get("skip", 0))
+            except (TypeError, ValueError):
+                skip = 0
+
             bill_obj = FireflyiiiBill(
                 id=attributes.get("id", bill_id),
                 name=attributes.get("name", ""),
                 value_min=value_min,
                 value_max=value_max,
-                currency=attributes.get("currency_code", ""),
+                currency=self._currency(attributes.get("currency_code")),
                 pay=pay_events,
                 paid=paid_events,
+                start_date=start_date,
+                end_date=end_date,
+                repeat_freq=attributes.get("repeat_freq", "") or "",
+                skip=skip,
+                active=bool(attributes.get("active", True)),
             )
 
             bill_list.update(bill_obj)
@@ -777,9 +1235,13 @@ class Fireflyiii:
         return bill_list
 
     async def transactions(
-        self, ids=None, account_id: Optional[str] = None, limit: Optional[int] = None
+        self,
+        ids=None,
+        account_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        types: Optional[List[str]] = None,
     ) -> FireflyiiiObjectBaseList:
-        """Get FireflyIII transactions"""
+        """Get FireflyIII transactions, of the types (withdrawal...) if given"""
         if account_id:
             path = f"/accounts/{account_id}/transactions"
         else:
@@ -806,65 +1268,291 @@ class Fireflyiii:
             type=FireflyiiiObjectType.TRANSACTIONS
         )
 
+        await self._load_currencies()
+
+        transaction_objs: List[FireflyiiiTransaction] = []
+
         if ids:
-            transactions = []
             for tid in ids:
-                transaction = await self._request_api("GET", f"{path}/{tid}")
-                if "data" not in transaction:
+                transaction_obj = await self._request_api(
+                    "GET", f"{path}/{tid}", parser=self._parse_transaction
+                )
+                if not transaction_obj:
                     _LOGGER.error(
                         "Invalid response from server on transactions on id %s, "
-                        + "expected JSON data response: '%s'",
+                        + "expected JSON data response",
                         tid,
-                        transaction,
                     )
                     continue
-                transactions.append(transaction)
+
+                transaction_objs.append(transaction_obj)
         else:
-            transactions = await self._request_api("GET", path, params)
-            if "data" not in transactions:
+            if not limit:
+                self._set_max_limit(params)
+
+            query = FireflyiiiQuery(params, TRANSACTIONS_FILTERS).where("type", types)
+            for type_params in query.requests():
+                response: Dict[str, Any] = {}
+                async for transaction in self._request_api_items(
+                    path, type_params, response
+                ):
+                    transaction_obj = self._transaction_obj(transaction)
+                    if transaction_obj:
+                        transaction_objs.append(transaction_obj)
+
+                if "data" not in response:
+                    _LOGGER.error(
+                        "Invalid response from server on transactions, "
+                        + "expected JSON data response: '%s'",
+                        response,
+                    )
+
+        transactions_list.extend_typed(
+            FireflyiiiObjectType.TRANSACTIONS, transaction_objs
+        )
+
+        return transactions_list
+
+    def _parse_transaction(self, message: Any) -> Optional[FireflyiiiTransaction]:
+        """Parses a single transaction response"""
+
+        if not isinstance(message, dict) or not isinstance(message.get("data"), dict):
+            return None
+
+        return self._transaction_obj(message["data"])
+
+    def _transaction_obj(
+        self, transaction: Dict[str, Any]
+    ) -> Optional[FireflyiiiTransaction]:
+        """Builds a transaction from a data item of the API"""
+
+        attributes = transaction.get("attributes", {})
+        if not attributes:
+            return None
+
+        transaction_id = transaction.get("id", 0)
+        if not transaction_id:
+            return None
+
+        attributes = attributes.get("transactions", [])
+        if len(attributes) == 0:
+            attributes = {}
+        else:
+            attributes = attributes[0]
+
+        try:
+            value = attributes.get("amount", 0)
+        except ValueError:
+            value = 0
+
+        try:
+            date = datetime.fromisoformat(attributes.get("date", None))
+        except (TypeError, ValueError):
+            return None
+
+        return FireflyiiiTransaction(
+            id=transaction_id,
+            description=attributes.get("description", ""),
+            value=value,
+            currency=self._currency(attributes.get("currency_code")),
+            date=date,
+        )
+
+    async def transactions_table(
+        self,
+        timerange: Optional[DateTimeRange] = None,
+        types: Optional[List[str]] = None,
+    ) -> Optional[FireflyiiiTransactionTable]:
+        """
+        Get FireflyIII transaction splits of the range in a columnar table
+
+        Transactions are downloaded page by page, returns None if a page fails.
+        Types (withdrawal, deposit...) are filtered by the server
+        """
+
+        # pylint: disable=import-outside-toplevel
+        from .fireflyiii_table import FireflyiiiTransactionTable
+
+        table = FireflyiiiTransactionTable()
+
+        get_timerange = timerange if timerange else self._timerange
+
+        params: Dict[str, Any] = {}
+        if (
+            get_timerange
+            and get_timerange.start_datetime
+            and get_timerange.end_datetime
+        ):
+            params = {
+                "start": get_timerange.start_datetime.strftime("%Y-%m-%d"),
+                "end": get_timerange.end_datetime.strftime("%Y-%m-%d"),
+            }
+
+        params["limit"] = TRANSACTIONS_PAGE_SIZE
+
+        query = FireflyiiiQuery(params, TRANSACTIONS_FILTERS).where("type", types)
+        for type_params in query.requests():
+            if not await self._transactions_table_pages(table, type_params):
+                return None
+
+        return table
+
+    async def _transactions_table_pages(
+        self, table: FireflyiiiTransactionTable, params: Dict[str, Any]
+    ) -> bool:
+        """Appends the pages of the transactions list to the table"""
+
+        page = 1
+        total_pages = 1
+        while page <= total_pages:
+            params["page"] = page
+
+            response: Dict[str, Any] = {}
+            async for transaction in self._request_api_items(
+                "/transactions", params, response
+            ):
+                attributes = transaction.get("attributes", {})
+                for split in attributes.get("transactions", []):
+                    table.append_split(split)
+
+            if "data" not in response:
                 _LOGGER.error(
-                    "Invalid response from server on transactions, "
+                    "Invalid response from server on transactions page %s, "
                     + "expected JSON data response: '%s'",
-                    transactions,
+                    page,
+                    response,
                 )
-                return transactions_list
+                return False
 
-        for transaction in transactions:
-            attributes = transaction.get("data", {}).get("attributes", {})
-            if not attributes:
-                continue
+            pagination = response.get("meta", {}).get("pagination", {})
+            try:
+                total_pages = int(pagination.get("total_pages", page))
+            except (TypeError, ValueError):
+                total_pages = page
 
-            transaction_id = transaction.get("data", {}).get("id", 0)
-            if not transaction_id:
-                continue
+            page += 1
 
-            attributes = attributes.get("transactions", [])
-            if len(attributes) == 0:
-                attributes = {}
-            else:
-                attributes = attributes[0]
+        return True
 
-            try:
-                value = attributes.get("amount", 0)
-            except ValueError:
-                value = 0
+    async def aggregation(
+        self, timerange: Optional[DateTimeRange] = None
+    ) -> Optional[FireflyiiiAggregation]:
+        """
+        Get FireflyIII category, budget and account totals of the range
 
-            try:
-                date = datetime.fromisoformat(attributes.get("date", None))
-            except ValueError:
-                continue
+        The totals are computed locally from one download of the transactions
+        of the range, and kept until the cache is cleared. Returns None when
+        there's no range or the download fails, so callers can fall back to
+        the server totals
+        """
 
-            transaction_obj = FireflyiiiTransaction(
-                id=transaction_id,
-                description=attributes.get("description", ""),
-                value=value,
-                currency=attributes.get("currency_code", ""),
-                date=date,
+        # pylint: disable=import-outside-toplevel
+        from .fireflyiii_aggregation import FireflyiiiAggregation
+
+        get_timerange = timerange if timerange else self._timerange
+        if (
+            not get_timerange
+            or not get_timerange.start_datetime
+            or not get_timerange.end_datetime
+        ):
+            return None
+
+        start = get_timerange.start_datetime.date()
+        end = get_timerange.end_datetime.date()
+
+        cache_key = ("aggregation", start, end)
+        if cache_key in self._api_cache:
+            return self._api_cache[cache_key]
+
+        _LOGGER.debug("Aggregating FireflyIII transactions from %s to %s", start, end)
+
+        table = await self.transactions_table(get_timerange)
+        aggregation = (
+            await self._offload(
+                "aggregate",
+                FireflyiiiAggregation.from_table,
+                table,
+                start,
+                end,
+                size=len(table),
+                threshold=self.offload_rows,
             )
+            if table is not None
+            else None
+        )
 
-            transactions_list.update(transaction_obj)
+        self._api_cache[cache_key] = aggregation
+        return aggregation
+
+    async def balance_history(
+        self, start: datetime, end: datetime, period: str = "1D"
+    ) -> Optional[List[FireflyiiiBalanceHistory]]:
+        """
+        Get FireflyIII balance history of the accounts between start and end
+
+        All accounts come in a single request to the overview chart, one
+        balance per period. The chart names the accounts, it has no ids.
+        Returns None when the request fails, so it isn't taken for a range
+        without history
+        """
+
+        params = {
+            "start": start.strftime("%Y-%m-%d"),
+            "end": end.strftime("%Y-%m-%d"),
+            "period": period,
+        }
+
+        return await self._request_api(
+            "GET",
+            "/chart/account/overview",
+            params,
+            timeout=60,
+            parser=self._parse_balance_history,
+        )
 
-        return transactions_list
+    def _parse_balance_history(
+        self, message: Any
+    ) -> Optional[List[FireflyiiiBalanceHistory]]:
+        """Parses a account overview chart response, None when invalid"""
+
+        if not isinstance(message, list):
+            _LOGGER.error(
+                "Invalid response from server on account chart, "
+                + "expected a list: '%s'",
+                message,
+            )
+            return None
+
+        history = []
+        for chart_set in message:
+            if not isinstance(chart_set, dict):
+                continue
+
+            entries = chart_set.get("entries", {})
+            if not isinstance(entries, dict):
+                continue
+
+            balances = []
+            for entry_date, entry_value in entries.items():
+                try:
+                    balances.append(
+                        (
+                            datetime.fromisoformat(entry_date).date(),
+                            float(entry_value),
+                        )
+                    )
+                except (TypeError, ValueError):
+                    continue
+
+            history.append(
+                FireflyiiiBalanceHistory(
+                    name=chart_set.get("label", ""),
+                    currency_code=chart_set.get("currency_code", ""),
+                    balances=tuple(sorted(balances)),
+                )
+            )
+
+        return history
 
     async def check_connection(self) -> bool:
         """Check if FireflyIII is connected"""
@@ -927,15 +1615,21 @@ class Fireflyiii:
         header["Content-Type"] = "application/json"
         header["Accept"] = "application/json"
 
-    def _request_hash(self, path: str, params: Optional[dict] = None):
-        hash_key = md5(
-            (
-                md5(path.encode("utf-8")).hexdigest()
-                + md5(json.dumps(params).encode("utf-8")).hexdigest()
-            ).encode("utf-8")
-        ).hexdigest()
-
-        return hash_key
+    def _request_key(
+        self,
+        path: str,
+        params: Optional[dict] = None,
+        parser: Optional[Callable[[Any], Any]] = None,
+    ) -> Tuple:
+        """Cache key of a request, a canonical tuple of path, parser and params"""
+        if not params:
+            return (path, parser)
+
+        return (
+            path,
+            parser,
+            *sorted((key, str(value)) for key, value in params.items()),
+        )
 
     async def _request_api(
         self,
@@ -944,82 +1638,382 @@ class Fireflyiii:
         params=None,
         data=None,
         timeout=10,
+        parser: Optional[Callable[[Any], Any]] = None,
     ):
-        """Request FireflyIII API"""
-        hash_key = None
+        """
+        Request FireflyIII API
+
+        When a parser is given the response is returned, and cached, as parsed
+        by it, the decoded payload is not kept. Identical GETs running at the
+        same time share one request, cancelling a caller doesn't cancel it.
+        A caller with a higher priority or a later deadline than the shared
+        request starts its own, which later callers then share
+        """
+
+        if method.upper() != "GET":
+            return await self._request_api_fetch(
+                method, path, params, data, timeout, parser
+            )
 
-        if method.upper() == "GET":
-            hash_key = self._request_hash(path, params)
-            if hash_key in self._api_cache:
-                _LOGGER.debug("FireflyIII api response from cache for '%s' ok", path)
-                return self._api_cache[hash_key]
+        cache_key = self._request_key(path, params, parser)
+        if cache_key in self._api_cache:
+            _LOGGER.debug("FireflyIII api response from cache for '%s' ok", path)
+            self.stats.cached += 1
+            return self._api_cache[cache_key]
 
-        _LOGGER.debug("Requesting FireflyIII api '%s'", path)
+        priority = REQUEST_PRIORITY.get()
+        deadline = REQUEST_DEADLINE.get()
+
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None and inflight.serves(priority, deadline):
+            _LOGGER.debug("FireflyIII api request for '%s' already running", path)
+            self.stats.coalesced += 1
+            return await asyncio.shield(inflight.future)
+
+        future = asyncio.ensure_future(
+            self._request_api_fetch(
+                method, path, params, data, timeout, parser, cache_key, self._api_cache
+            )
+        )
+        self._inflight[cache_key] = FireflyiiiInflightRequest(
+            future, priority, deadline
+        )
+        future.add_done_callback(
+            lambda future: self._request_api_done(cache_key, future)
+        )
+
+        return await asyncio.shield(future)
+
+    def _request_api_done(self, cache_key: Tuple, future: asyncio.Future) -> None:
+        """Forgets a finished shared request"""
+
+        # A request started for a more urgent caller may have replaced it
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None and inflight.future is future:
+            del self._inflight[cache_key]
+
+        # Retrieved here, the callers awaiting it may all have been cancelled
+        if not future.cancelled():
+            future.exception()
+
+    async def _request_api_fetch(
+        self,
+        method="GET",
+        path="",
+        params=None,
+        data=None,
+        timeout=10,
+        parser: Optional[Callable[[Any], Any]] = None,
+        cache_key: Optional[Tuple] = None,
+        cache: Optional[Dict[Tuple, Any]] = None,
+    ):
+        """
+        Requests FireflyIII API, storing the response in cache if given
+
+        Timeouts, connection errors and overload statuses are retried as the
+        retry policy of the method allows, within the deadline of the refresh.
+        A Retry-After pauses every request, the request isn't retried when it
+        asks to wait longer than the policy or the deadline allow
+        """
 
         url = f"{self.host_api}{path}"
 
-        method = method.lower()
+        request_headers: Dict[str, str] = {}
+
+        self._set_auth(request_headers)
+        self._set_headers(request_headers)
+
+        policy = RETRY_IDEMPOTENT if method.upper() == "GET" else RETRY_NONE
+
+        attempt = 0
+        body_size = 0
+        while True:
+            message: Any = {}
+            retry_after = None
+            transient = False
+            failed = False
+
+            # The slot is held for the request only, not for the rate limit
+            # and retry waits
+            async with self._request_slot():
+                request_timeout = self._request_timeout(timeout, path)
+                if request_timeout is None:
+                    failed = True
+                    break
+
+                _LOGGER.debug("Requesting FireflyIII api '%s'", path)
+                self.stats.requests += 1
+
+                try:
+                    async with aiohttp.ClientSession() as session:
+                        async with session.request(
+                            method,
+                            url,
+                            headers=request_headers,
+                            params=params,
+                            json=data,
+                            verify_ssl=self._verify_certificates,
+                            timeout=request_timeout,
+                        ) as resp:
+                            self._rate_limit.update(resp.headers)
+                            body = await resp.read()
+                            body_size = len(body)
+
+                            if resp.status in RETRY_STATUSES:
+                                transient = True
+                                retry_after = retry_after_seconds(
+                                    resp.headers.get("Retry-After")
+                                )
+                                if retry_after is not None:
+                                    self._rate_limit.pause(retry_after)
+
+                            try:
+                                with self.blocking.section(f"decode {path}", body_size):
+                                    message = self._json_loads(body)
+                            except ValueError:
+                                _LOGGER.error(
+                                    "Response from server not a JSON: %s",
+                                    body.decode(errors="replace"),
+                                )
+                                message = {}
+
+                            if isinstance(message, dict) and "message" in message:
+                                _LOGGER.error(
+                                    "Error in server api call: %s",
+                                    message.get("message"),
+                                )
+
+                            if resp.status not in [200]:
+                                _LOGGER.error(
+                                    "Error in server api call, status %s: %s",
+                                    resp.status,
+                                    (
+                                        message.get("message", "")
+                                        if isinstance(message, dict)
+                                        else ""
+                                    ),
+                                )
+                except (TimeoutError, ServerTimeoutError):
+                    _LOGGER.error("Error in server api call, timeout")
+                    transient = failed = True
+                except ContentTypeError:
+                    _LOGGER.error("Error in server api call, content type error")
+                    failed = True
+                except AssertionError:
+                    _LOGGER.error("Error in server api call, AssertionError")
+                    failed = True
+                except ClientConnectorError:
+                    _LOGGER.error("Error in server api call, connection error")
+                    transient = failed = True
+
+            if transient and await self._retry_wait(policy, attempt, retry_after, path):
+                attempt += 1
+                continue
+
+            break
+
+        if failed:
+            message = {}
+        else:
+            _LOGGER.debug("FireflyIII api response for '%s' ok", path)
+
+        if isinstance(parser, FireflyiiiResponseTrim):
+            # A trim only reads the message, so large ones can run in the
+            # executor. Decoding stays here, the JSON decoders hold the GIL
+            message = await self._offload(
+                f"trim {path}",
+                parser,
+                message,
+                size=body_size,
+                threshold=self.offload_bytes,
+            )
+        elif parser:
+            with self.blocking.section(f"parse {path}", body_size):
+                message = parser(message)
+
+        # Failures aren't cached, the next caller tries again
+        if cache_key and cache is not None and not transient and not failed:
+            cache[cache_key] = message
+
+        return message
+
+    async def _retry_wait(
+        self,
+        policy: FireflyiiiRetryPolicy,
+        attempt: int,
+        retry_after: Optional[float],
+        path: str,
+    ) -> bool:
+        """
+        Waits before retrying a failed attempt, False when the policy, the
+        server or the deadline don't allow another one
+        """
+
+        if attempt + 1 >= policy.attempts:
+            return False
+
+        delay = policy.delay(attempt, retry_after)
+        if delay is None:
+            _LOGGER.warning(
+                "Not retrying FireflyIII api '%s', server asked to wait %.0f seconds",
+                path,
+                retry_after,
+            )
+            return False
+
+        if not within_deadline(delay):
+            return False
 
-        request_headers = {}
+        _LOGGER.debug("Retrying FireflyIII api '%s' in %.1f seconds", path, delay)
+        self.stats.retries += 1
+        await asyncio.sleep(delay)
+        return True
+
+    async def _request_api_items(
+        self,
+        path: str,
+        params: Optional[dict] = None,
+        response: Optional[Dict[str, Any]] = None,
+        timeout=10,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Request FireflyIII API list, yields the data items as they arrive
+
+        The body is decoded while it's received, so only one item is held at
+        a time. The rest of the document (meta, links or error) is set into
+        response. Streamed responses are not cached. Failures are retried as
+        other GETs are, as long as no item has been yielded
+        """
+
+        _LOGGER.debug("Requesting FireflyIII api items '%s'", path)
+
+        attempt = 0
+        while True:
+            outcome = FireflyiiiStreamAttempt()
+
+            async with self._request_slot():
+                async for item in self._request_api_stream(
+                    path, params, response, timeout, outcome
+                ):
+                    yield item
+
+            # The items yielded can't be taken back, only a request failing
+            # before the first one is sent again
+            if (
+                outcome.transient
+                and not outcome.items
+                and await self._retry_wait(
+                    RETRY_IDEMPOTENT, attempt, outcome.retry_after, path
+                )
+            ):
+                attempt += 1
+                continue
+
+            return
+
+    async def _request_api_stream(
+        self,
+        path: str,
+        params: Optional[dict] = None,
+        response: Optional[Dict[str, Any]] = None,
+        timeout=10,
+        outcome: Optional[FireflyiiiStreamAttempt] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams the data items of a list, run with a scheduler slot held and
+        after the rate limit wait. How it went is set into outcome
+        """
+
+        if outcome is None:
+            outcome = FireflyiiiStreamAttempt()
+
+        url = f"{self.host_api}{path}"
+
+        request_headers: Dict[str, str] = {}
 
         self._set_auth(request_headers)
         self._set_headers(request_headers)
 
-        message = None
+        stream = FireflyiiiJsonItemStream(loads=self._json_loads)
 
-        async with aiohttp.ClientSession() as session:
-            http_method = getattr(session, method)
+        request_timeout = self._request_timeout(timeout, path)
+        if request_timeout is None:
+            return
+
+        self.stats.requests += 1
 
+        async with aiohttp.ClientSession() as session:
             try:
-                async with http_method(
+                async with session.get(
                     url,
                     headers=request_headers,
                     params=params,
-                    json=data,
                     verify_ssl=self._verify_certificates,
-                    timeout=timeout,
+                    timeout=request_timeout,
                 ) as resp:
-                    try:
-                        message = await resp.text()
-                    except UnicodeDecodeError:
-                        message = await resp.read()
-                        message = message.decode(errors="replace")
-
-                    try:
-                        message = json.loads(message)
-                    except ValueError:
-                        _LOGGER.error("Response from server not a JSON: %s", message)
-
-                    if "message" in message:
+                    self._rate_limit.update(resp.headers)
+
+                    # Overloaded, the body isn't read and the request retried
+                    if resp.status in RETRY_STATUSES:
+                        outcome.transient = True
+                        outcome.retry_after = retry_after_seconds(
+                            resp.headers.get("Retry-After")
+                        )
+                        if outcome.retry_after is not None:
+                            self._rate_limit.pause(outcome.retry_after)
+
+                        _LOGGER.error(
+                            "Error in server api call, status %s", resp.status
+                        )
+                        return
+
+                    async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                        # The section runs until the next read, it includes
+                        # what the caller does with the items
+                        started = time.perf_counter()
+                        for item in stream.feed(chunk):
+                            outcome.items += 1
+                            yield item
+
+                        self.blocking.record(
+                            f"stream {path}", time.perf_counter() - started, len(chunk)
+                        )
+
+                    document = stream.close()
+
+                    if not isinstance(document, dict):
+                        _LOGGER.error("Response from server not a JSON: %s", document)
+                        return
+
+                    if "message" in document:
                         _LOGGER.error(
-                            "Error in server api call: %s", message.get("message")
+                            "Error in server api call: %s", document.get("message")
                         )
 
                     if resp.status not in [200]:
                         _LOGGER.error(
                             "Error in server api call, status %s: %s",
                             resp.status,
-                            message.get("message", ""),
+                            document.get("message", ""),
                         )
 
-                    await session.close()
-
-                    _LOGGER.debug("FireflyIII api response for '%s' ok", path)
-                    if hash_key:
-                        self._api_cache[hash_key] = message
+                    _LOGGER.debug(
+                        "FireflyIII api response for '%s' ok, %s items",
+                        path,
+                        stream.items_count,
+                    )
 
-                    return message
+                    if response is not None:
+                        response.update(document)
+            except ValueError:
+                _LOGGER.error("Response from server not a JSON on '%s'", path)
             except (TimeoutError, ServerTimeoutError):
                 _LOGGER.error("Error in server api call, timeout")
+                outcome.transient = True
             except ContentTypeError:
                 _LOGGER.error("Error in server api call, content type error")
             except AssertionError:
                 _LOGGER.error("Error in server api call, AssertionError")
             except ClientConnectorError:
                 _LOGGER.error("Error in server api call, connection error")
-
-            if not isinstance(message, dict):
-                return {}
-
-            await session.close()
-            return message
+                outcome.transient = True
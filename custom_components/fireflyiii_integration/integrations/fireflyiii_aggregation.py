@@ -0,0 +1,114 @@
+"""
+FireflyIII Integration Local Aggregation
+
+Computes category, budget and account totals of a range from a single
+download of its transactions, instead of asking FireflyIII for each object
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from .fireflyiii_objects import FireflyiiiCurrency
+from .fireflyiii_table import FireflyiiiTransactionKind, FireflyiiiTransactionTable
+
+Totals = Dict[Tuple[str, str], float]
+
+
+def _merge(*totals: Totals) -> Totals:
+    """Sums totals with the same keys"""
+    merged: Totals = {}
+    for total in totals:
+        for key, value in total.items():
+            merged[key] = merged.get(key, 0) + value
+
+    return merged
+
+
+@dataclass(slots=True, frozen=True)
+class FireflyiiiAggregation:
+    """
+    FireflyIII Totals Of A Range
+
+    Totals are keyed by (id, currency code) and signed as FireflyIII does,
+    spent is negative and earned positive. Account flows follow the money,
+    the source account has an outflow and the destination an inflow, in the
+    currency of each side of the transaction
+    """
+
+    start: Optional[date] = None
+    end: Optional[date] = None
+    transactions_count: int = 0
+    category_spent: Totals = field(default_factory=dict)
+    category_earned: Totals = field(default_factory=dict)
+    budget_spent: Totals = field(default_factory=dict)
+    account_inflow: Totals = field(default_factory=dict)
+    account_outflow: Totals = field(default_factory=dict)
+
+    @classmethod
+    def from_table(
+        cls,
+        table: FireflyiiiTransactionTable,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> "FireflyiiiAggregation":
+        """Aggregates the transactions of the table between start and end"""
+
+        mask = table.date_mask(start, end)
+        withdrawals = mask & table.kind_mask(FireflyiiiTransactionKind.WITHDRAWAL)
+        deposits = mask & table.kind_mask(FireflyiiiTransactionKind.DEPOSIT)
+
+        return cls(
+            start=start,
+            end=end,
+            transactions_count=int(mask.sum()),
+            category_spent={
+                key: -value
+                for key, value in table.group_sum("category", withdrawals).items()
+            },
+            category_earned=table.group_sum("category", deposits),
+            budget_spent={
+                key: -value
+                for key, value in table.group_sum("budget", withdrawals).items()
+            },
+            account_inflow=_merge(
+                table.group_sum("destination", mask),
+                table.group_sum("destination", mask, foreign=True),
+            ),
+            account_outflow=_merge(
+                table.group_sum("source", mask),
+                table.group_sum("source", mask, foreign=True),
+            ),
+        )
+
+    def category_spent_in(
+        self, category_id: str, currency: FireflyiiiCurrency
+    ) -> float:
+        """Spent in the category, in the currency"""
+        return self.category_spent.get((category_id, str(currency)), 0)
+
+    def category_earned_in(
+        self, category_id: str, currency: FireflyiiiCurrency
+    ) -> float:
+        """Earned in the category, in the currency"""
+        return self.category_earned.get((category_id, str(currency)), 0)
+
+    def budget_spent_in(self, budget_id: str, currency: FireflyiiiCurrency) -> float:
+        """Spent in the budget, in the currency"""
+        return self.budget_spent.get((budget_id, str(currency)), 0)
+
+    def account_inflow_in(self, account_id: str, currency: FireflyiiiCurrency) -> float:
+        """Money into the account, in the currency"""
+        return self.account_inflow.get((account_id, str(currency)), 0)
+
+    def account_outflow_in(
+        self, account_id: str, currency: FireflyiiiCurrency
+    ) -> float:
+        """Money out of the account, in the currency"""
+        return self.account_outflow.get((account_id, str(currency)), 0)
+
+    def account_delta(self, account_id: str, currency: FireflyiiiCurrency) -> float:
+        """Balance change of the account in the range"""
+        return self.account_inflow_in(account_id, currency) - self.account_outflow_in(
+            account_id, currency
+        )
@@ -0,0 +1,208 @@
+"""
+FireflyIII Integration Balance History Backfill
+
+Imports the balance history of the accounts into Home Assistant long term
+statistics. History is requested month by month and the progress is kept in
+a FireflyiiiStore, so an interrupted backfill resumes where it stopped
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple, cast
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.core import HomeAssistant
+
+from ..const import DOMAIN
+from .fireflyiii_coordinator import FireflyiiiCoordinator
+from .fireflyiii_functions import statistics_day_start
+from .fireflyiii_objects import FireflyiiiAccount
+from .fireflyiii_retry import request_deadline
+from .fireflyiii_scheduler import FireflyiiiPriority, request_priority
+from .fireflyiii_store import FireflyiiiStore
+
+_LOGGER = logging.getLogger(__name__)
+
+# Statistics are sent to the recorder once this many rows are pending
+STATISTICS_BATCH_SIZE = 5000
+
+
+def balance_statistic_id(entry_id: str, account_id: str) -> str:
+    """Statistic id of the balance of an account"""
+    return f"{DOMAIN}:{entry_id.lower()}_account_{account_id}"
+
+
+def month_ranges(start: date, end: date) -> Iterator[Tuple[date, date]]:
+    """Splits start to end, inclusive, in calendar months"""
+
+    month_start = start
+    while month_start <= end:
+        next_month = (month_start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        yield month_start, min(next_month - timedelta(days=1), end)
+        month_start = next_month
+
+
+class FireflyiiiBalanceBackfill:
+    """
+    Backfills the balance of the accounts of a config entry into statistics
+
+    Each account gets one statistics row per day, at the first UTC hour of
+    the local day. Rows are imported in batches through the recorder, which writes
+    them in its own thread, and the progress is saved after each batch
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator: FireflyiiiCoordinator):
+        self._hass = hass
+        self._coordinator = coordinator
+        self._entry_id = coordinator.entry.entry_id
+        self._store = FireflyiiiStore.get_store(hass, f"backfill_{self._entry_id}")
+        self._task: Optional[asyncio.Task] = None
+        self._metadata: Dict[str, StatisticMetaData] = {}
+        self._pending: Dict[str, List[StatisticData]] = {}
+        self._pending_count = 0
+
+    @property
+    def running(self) -> bool:
+        """Is a backfill running"""
+        return self._task is not None and not self._task.done()
+
+    def async_start(self, start: date, end: date, restart: bool = False) -> None:
+        """Starts the backfill in the background"""
+
+        if self.running:
+            _LOGGER.warning(
+                "FireflyIII balance backfill already running for '%s'",
+                self._coordinator.name,
+            )
+            return
+
+        # The task only gets request slots the refresh and the user don't need,
+        # and runs as long as it takes, without a refresh deadline
+        with request_priority(FireflyiiiPriority.BACKFILL), request_deadline(None):
+            self._task = self._hass.async_create_background_task(
+                self.async_run(start, end, restart),
+                f"{DOMAIN} balance backfill {self._entry_id}",
+            )
+
+    def async_cancel(self) -> None:
+        """Cancels a running backfill, the progress saved is kept"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def async_run(self, start: date, end: date, restart: bool = False) -> int:
+        """Imports the balances from start to end, returns the rows imported"""
+
+        resume_from = start
+        progress = None if restart else await self._store.async_load()
+        if (
+            progress
+            and progress.get("start") == start.isoformat()
+            and progress.get("end") == end.isoformat()
+        ):
+            resume_from = date.fromisoformat(progress["next"])
+            _LOGGER.info("Resuming FireflyIII balance backfill from %s", resume_from)
+
+        api_accounts = cast(
+            Dict[str, FireflyiiiAccount], self._coordinator.api_data.accounts
+        )
+        accounts: Dict[Tuple[str, str], FireflyiiiAccount] = {
+            (account.name, str(account.currency)): account
+            for account in api_accounts.values()
+        }
+        if not accounts:
+            _LOGGER.warning("No FireflyIII accounts to backfill")
+            return 0
+
+        imported = 0
+        for month_start, month_end in month_ranges(resume_from, end):
+            history = await self._coordinator.api.balance_history(
+                datetime.combine(month_start, time.min),
+                datetime.combine(month_end, time.min),
+            )
+
+            # A failed month stops the backfill, the next run starts from it
+            if history is None:
+                imported += self._flush()
+                await self._save_progress(start, end, month_start)
+                _LOGGER.warning(
+                    "FireflyIII balance backfill stopped at %s, the month failed "
+                    + "and will be retried by the next run",
+                    month_start,
+                )
+                return imported
+
+            for account_history in history:
+                account = accounts.get(
+                    (account_history.name, account_history.currency_code)
+                )
+                if account:
+                    self._add(account, account_history.balances)
+
+            if self._pending_count >= STATISTICS_BATCH_SIZE:
+                imported += self._flush()
+                await self._save_progress(start, end, month_end + timedelta(days=1))
+
+        # Every month was imported, there's nothing left to resume
+        imported += self._flush()
+        await self._store.async_remove()
+
+        _LOGGER.info("FireflyIII balance backfill imported %s statistics", imported)
+        return imported
+
+    async def _save_progress(self, start: date, end: date, resume_from: date) -> None:
+        """Saves the day the backfill from start to end resumes from"""
+        await self._store.async_save(
+            {
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "next": resume_from.isoformat(),
+            }
+        )
+
+    def _add(
+        self, account: FireflyiiiAccount, balances: Tuple[Tuple[date, float], ...]
+    ) -> None:
+        """Queues the balances of an account as statistics rows"""
+
+        statistic_id = balance_statistic_id(self._entry_id, account.id)
+        if statistic_id not in self._metadata:
+            self._metadata[statistic_id] = StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=f"{account.name} balance",
+                source=DOMAIN,
+                statistic_id=statistic_id,
+                unit_of_measurement=str(account.currency),
+            )
+
+        rows = self._pending.setdefault(statistic_id, [])
+        for day, balance in balances:
+            rows.append(
+                StatisticData(
+                    start=statistics_day_start(day),
+                    mean=balance,
+                    min=balance,
+                    max=balance,
+                    state=balance,
+                )
+            )
+
+        self._pending_count += len(balances)
+
+    def _flush(self) -> int:
+        """Sends the pending rows to the recorder, returns how many"""
+
+        for statistic_id, rows in self._pending.items():
+            if rows:
+                async_add_external_statistics(
+                    self._hass, self._metadata[statistic_id], rows
+                )
+
+        flushed = self._pending_count
+        self._pending = {}
+        self._pending_count = 0
+        return flushed
@@ -0,0 +1,111 @@
+"""
+FireflyIII Integration Blocking Monitor
+
+Times the synchronous sections the integration runs on the event loop, the
+work between awaits, to tell our own stalls apart from a slow server
+"""
+
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+# Sections blocking the loop longer than this, in seconds, are logged
+BLOCKING_THRESHOLD = 0.1
+
+# Worst sections kept for the diagnostics
+BLOCKING_WORST_SIZE = 10
+
+
+@dataclass(slots=True, frozen=True)
+class FireflyiiiBlockingSection:
+    """A synchronous section, size is the bytes or items it processed"""
+
+    stage: str
+    seconds: float
+    size: Optional[int]
+    at: datetime
+
+
+class FireflyiiiBlockingMonitor:
+    """
+    Times synchronous sections and keeps the worst ones
+
+    Every section is timed, only the ones over the threshold are logged
+    """
+
+    __slots__ = ("threshold", "sections", "slow", "_worst", "_sequence")
+
+    def __init__(self, threshold: float = BLOCKING_THRESHOLD) -> None:
+        self.threshold = threshold
+        self.sections = 0
+        self.slow = 0
+        self._worst: List[Tuple[float, int, FireflyiiiBlockingSection]] = []
+        self._sequence = itertools.count()
+
+    @contextmanager
+    def section(self, stage: str, size: Optional[int] = None) -> Iterator[None]:
+        """Times the block as a section of the stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, size)
+
+    def record(self, stage: str, seconds: float, size: Optional[int] = None) -> None:
+        """Records a section timed by the caller"""
+
+        self.sections += 1
+        if seconds > self.threshold:
+            self._log(stage, seconds, size)
+
+        if len(self._worst) >= BLOCKING_WORST_SIZE and seconds <= self._worst[0][0]:
+            return
+
+        item = (
+            seconds,
+            next(self._sequence),
+            FireflyiiiBlockingSection(stage, seconds, size, datetime.now(timezone.utc)),
+        )
+        if len(self._worst) < BLOCKING_WORST_SIZE:
+            heapq.heappush(self._worst, item)
+        else:
+            heapq.heapreplace(self._worst, item)
+
+    def _log(self, stage: str, seconds: float, size: Optional[int]) -> None:
+        """Logs a section over the threshold"""
+        self.slow += 1
+        _LOGGER.warning(
+            "FireflyIII '%s' blocked the event loop for %.3f seconds, size %s",
+            stage,
+            seconds,
+            size,
+        )
+
+    @property
+    def worst(self) -> List[FireflyiiiBlockingSection]:
+        """Longest sections recorded, longest first"""
+        return [section for *_, section in sorted(self._worst, reverse=True)]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Summary for the diagnostics"""
+        return {
+            "threshold": self.threshold,
+            "sections": self.sections,
+            "slow": self.slow,
+            "worst": [
+                {
+                    "stage": section.stage,
+                    "seconds": round(section.seconds, 4),
+                    "size": section.size,
+                    "at": section.at.isoformat(),
+                }
+                for section in self.worst
+            ],
+        }
@@ -0,0 +1,369 @@
+"""
+FireflyIII Integration Config Flow Schemas
+
+Kept apart from the config so voluptuous and the selectors are only loaded
+by the config flow
+"""
+
+from types import MappingProxyType
+from typing import Optional
+
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+from homeassistant.const import CONF_ACCESS_TOKEN, CONF_NAME, CONF_URL, WEEKDAYS
+from homeassistant.helpers import selector
+
+from .fireflyiii_config import (
+    CONF_DATE_LASTX_BACK,
+    CONF_DATE_MONTH_START,
+    CONF_DATE_WEEK_START,
+    CONF_DATE_YEAR_START,
+    CONF_RETURN_ACCOUNT_ID,
+    CONF_RETURN_ACCOUNT_TYPE,
+    CONF_RETURN_ACCOUNT_TYPES,
+    CONF_RETURN_ACCOUNTS,
+    CONF_RETURN_BILLS,
+    CONF_RETURN_BUDGETS,
+    CONF_RETURN_CATEGORIES,
+    CONF_RETURN_CATEGORIES_ID,
+    CONF_RETURN_CURRENCY,
+    CONF_RETURN_PIGGY_BANKS,
+    CONF_RETURN_RANGE,
+    CONF_RETURN_RANGE_TYPES,
+    FireflyiiiConfig,
+)
+
+
+class FireflyiiiConfigSchema:
+    """FireflyIII Config Flow Schemas"""
+
+    _data_source: Optional[FireflyiiiConfig] = None
+
+    def __init__(self):
+        raise NotImplementedError()
+
+    @classmethod
+    def set_data_source(cls, source: FireflyiiiConfig):
+        """Sets data source for the config"""
+
+        if isinstance(source, FireflyiiiConfig):
+            data_source = source
+        elif isinstance(source, dict):
+            data_source = FireflyiiiConfig(source)
+        elif isinstance(source, MappingProxyType):
+            data_source = FireflyiiiConfig(dict(source))
+        else:
+            return
+
+        cls._data_source = data_source
+
+    @classmethod
+    def data_source(cls) -> FireflyiiiConfig:
+        """Gets the data source"""
+
+        if not isinstance(cls._data_source, FireflyiiiConfig):
+            cls._data_source = FireflyiiiConfig()
+
+        return cls._data_source
+
+    @classmethod
+    def name(cls):
+        """Config flow name field"""
+        return {vol.Required(CONF_NAME, default=cls.data_source().name): cv.string}
+
+    @classmethod
+    def access_token(cls):
+        """Config flow access token field"""
+        return {
+            vol.Required(
+                CONF_ACCESS_TOKEN, default=cls.data_source().access_token
+            ): cv.string
+        }
+
+    @classmethod
+    def url(cls):
+        """Config flow url field"""
+        return {vol.Required(CONF_URL, default=cls.data_source().host): cv.string}
+
+    @classmethod
+    def currency(cls):
+        """Config flow currency field"""
+        return {
+            vol.Required(
+                CONF_RETURN_CURRENCY, default=str(cls.data_source().currency)
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    multiple=False,
+                    custom_value=False,
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                    options=[
+                        {
+                            "label": f"{currency.name} ({currency.code})",
+                            "value": currency.code,
+                        }
+                        for _, currency in cls.data_source().enabled_currencies.items()
+                    ],
+                )
+            )
+        }
+
+    @classmethod
+    def schema_auth(cls, name_schema=True):
+        """Config flow Schema auth"""
+
+        schema = {}
+        if name_schema:
+            schema.update(cls.name())
+
+        schema.update(cls.url())
+        schema.update(cls.access_token())
+        return vol.Schema(schema)
+
+    @classmethod
+    def _return_this(cls, name: str, default=None):
+        """Config flow builded to get somthing"""
+        kargs = {}
+        if default:
+            kargs = {"default": default}
+
+        return {vol.Optional(name, **kargs): cv.boolean}
+
+    @classmethod
+    def return_budgets(cls):
+        """Config flow return budgets"""
+        return cls._return_this(CONF_RETURN_BUDGETS, cls.data_source().get_budgets)
+
+    @classmethod
+    def return_bills(cls):
+        """Config flow return bills"""
+        return cls._return_this(CONF_RETURN_BILLS, cls.data_source().get_bills)
+
+    @classmethod
+    def return_piggy_banks(cls):
+        """Config flow return piggy banks"""
+        return cls._return_this(
+            CONF_RETURN_PIGGY_BANKS, cls.data_source().get_piggy_banks
+        )
+
+    @classmethod
+    def return_categories(cls):
+        """Config flow return categories"""
+        return cls._return_this(
+            CONF_RETURN_CATEGORIES, cls.data_source().get_categories
+        )
+
+    @classmethod
+    def return_accounts(cls):
+        """Config flow return accounts"""
+        return cls._return_this(CONF_RETURN_ACCOUNTS, cls.data_source().get_accounts)
+
+    @classmethod
+    def return_range(cls):
+        """Config flow return range type"""
+        return {
+            vol.Required(
+                CONF_RETURN_RANGE, default=cls.data_source().date_range_type
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=CONF_RETURN_RANGE_TYPES,
+                    translation_key=CONF_RETURN_RANGE,
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                )
+            ),
+        }
+
+    @classmethod
+    def schema_sensor(cls):
+        """Config flow Schema sensors"""
+        schema = {}
+        schema.update(cls.currency())
+        schema.update(cls.return_budgets())
+        schema.update(cls.return_bills())
+        schema.update(cls.return_piggy_banks())
+        schema.update(cls.return_categories())
+        schema.update(cls.return_accounts())
+        schema.update(cls.return_range())
+        return vol.Schema(schema)
+
+    @classmethod
+    def categories_ids(cls):
+        """Config flow return category id's"""
+        return {
+            vol.Optional(
+                CONF_RETURN_CATEGORIES_ID, default=cls.data_source().categories_ids
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    multiple=True,
+                    custom_value=False,
+                    # pylint: disable=line-too-long
+                    options=[
+                        {"label": category.name, "value": category_id}
+                        for category_id, category in cls.data_source().categories_autocomplete.items()
+                    ],
+                )
+            )
+        }
+
+    @classmethod
+    def account_types(cls):
+        """Config flow return account types"""
+        return {
+            vol.Required(
+                CONF_RETURN_ACCOUNT_TYPE,
+                default=cls.data_source().account_types,
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=CONF_RETURN_ACCOUNT_TYPES,
+                    translation_key=CONF_RETURN_ACCOUNT_TYPE,
+                    multiple=True,
+                )
+            )
+        }
+
+    @classmethod
+    def account_ids(cls):
+        """Config flow return account id's"""
+        return {
+            vol.Optional(
+                CONF_RETURN_ACCOUNT_ID, default=cls.data_source().account_ids
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    multiple=True,
+                    custom_value=False,
+                    # pylint: disable=line-too-long
+                    options=[
+                        {"label": account.name, "value": account_id}
+                        for account_id, account in cls.data_source().accounts_autocomplete.items()
+                    ],
+                )
+            )
+        }
+
+    @classmethod
+    def year_start(cls):
+        """Config flow set year start"""
+        return {
+            vol.Required(
+                CONF_DATE_YEAR_START, default=cls.data_source().year_start
+            ): selector.DateSelector()
+        }
+
+    @classmethod
+    def month_start(cls):
+        """Config flow set month start"""
+        return {
+            vol.Required(
+                CONF_DATE_MONTH_START, default=cls.data_source().month_start
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=1,
+                    max=31,
+                    step=1,
+                    mode=selector.NumberSelectorMode.BOX,
+                )
+            )
+        }
+
+    @classmethod
+    def week_start(cls):
+        """Config flow set week start"""
+        return {
+            vol.Required(
+                CONF_DATE_WEEK_START, default=cls.data_source().week_start
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=WEEKDAYS,
+                    translation_key=CONF_DATE_WEEK_START,
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                )
+            )
+        }
+
+    @classmethod
+    def lastx_time(cls):
+        """Config flow set custum time"""
+        lastx = cls.data_source().lastx_days
+        lastx_back = lastx.get("back", 1)
+
+        return {
+            vol.Required(
+                CONF_DATE_LASTX_BACK, default=lastx_back
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=1,
+                    step=1,
+                    mode=selector.NumberSelectorMode.BOX,
+                )
+            )
+        }
+
+    @classmethod
+    def lastx_type(cls):
+        """Config flow set custum time type"""
+        lastx = cls.data_source().lastx_days
+        lastx_type = lastx.get("type")
+
+        return {
+            vol.Required(
+                CONF_DATE_LASTX_BACK, default=lastx_type
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=1,
+                    step=1,
+                    mode=selector.NumberSelectorMode.BOX,
+                )
+            )
+        }
+
+    @classmethod
+    def schema_config(cls, time_schema=True):
+        """Config flow Schema config"""
+        schema = {}
+
+        if cls.data_source().get_categories:
+            schema.update(cls.categories_ids())
+
+        if cls.data_source().get_accounts:
+            schema.update(cls.account_types())
+            schema.update(cls.account_ids())
+
+        if time_schema:
+            if (
+                cls.data_source().is_date_range_year
+                or cls.data_source().is_date_range_last_year
+            ):
+                schema.update(cls.year_start())
+            elif (
+                cls.data_source().is_date_range_month
+                or cls.data_source().is_date_range_last_month
+            ):
+                schema.update(cls.month_start())
+            elif (
+                cls.data_source().is_date_range_week
+                or cls.data_source().is_date_range_last_week
+            ):
+                schema.update(cls.week_start())
+            elif cls.data_source().is_date_range_lastx:
+                schema.update(cls.lastx_time())
+                schema.update(cls.lastx_type())
+
+        return vol.Schema(schema)
+
+    @classmethod
+    def schema_options(cls):
+        """Config flow Schema options"""
+        schema = cls.schema_config(time_schema=False).schema
+
+        return vol.Schema(schema)
+
+    @classmethod
+    def schema_reconfigure(cls):
+        """Config flow Schema Reconfigure"""
+        schema = cls.schema_auth(name_schema=False).schema
+        return vol.Schema(schema)
+
+    @classmethod
+    def schema_reconfigure2(cls):
+        """Config flow Schema Reconfigure"""
+        schema = cls.schema_config(time_schema=False).schema
+        return vol.Schema(schema)
@@ -1,20 +1,52 @@
 """FireflyIII Integration Coordinator"""
 
+from __future__ import annotations
+
+import asyncio
 import logging
 from calendar import monthrange
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
-from datetimerange import DateTimeRange
 from homeassistant import config_entries
 from homeassistant.const import WEEKDAYS
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .fireflyiii import Fireflyiii
 from .fireflyiii_config import FireflyiiiConfig
 from .fireflyiii_objects import FireflyiiiObjectBaseList
+from .fireflyiii_plan import FireflyiiiRefreshPlan
+
+if TYPE_CHECKING:
+    from datetimerange import DateTimeRange
+
+    from .fireflyiii_aggregation import FireflyiiiAggregation
 
 _LOGGER = logging.getLogger(__name__)
 
+# Longest time a refresh can take, requests still running then are cancelled
+REFRESH_DEADLINE = timedelta(seconds=45)
+
+# Share of what's left of the deadline the range totals can take, the nodes
+# waiting for them then run on the server totals
+AGGREGATION_DEADLINE_SHARE = 0.5
+
+# Refreshes run on the server totals after the range totals took too long,
+# before they're tried again
+AGGREGATION_SKIP_REFRESHES = 5
+
+# Nodes of the refresh plan whose results are the coordinator data
+REFRESH_OUTPUTS = (
+    "about",
+    "preferences",
+    "accounts",
+    "categories",
+    "bills",
+    "piggy_banks",
+    "budgets",
+)
+
 
 class FireflyiiiCoordinator(DataUpdateCoordinator):
     """FireflyIII coordinator class"""
@@ -24,6 +56,8 @@ class FireflyiiiCoordinator(DataUpdateCoordinator):
         self.interval = timedelta(seconds=interval)
         self._entry = entry
         self._hass = hass
+        self.last_refresh_plan: Optional[FireflyiiiRefreshPlan] = None
+        self._aggregation_skips = 0
 
         self.name = f"FireflyIII ({self.user_data.name})"
 
@@ -67,6 +101,9 @@ class FireflyiiiCoordinator(DataUpdateCoordinator):
     def timerange(self) -> DateTimeRange | None:
         """Return defined timerange"""
 
+        # pylint: disable=import-outside-toplevel
+        from datetimerange import DateTimeRange
+
         timerange = None
 
         reference = datetime.today()
@@ -197,6 +234,11 @@ class FireflyiiiCoordinator(DataUpdateCoordinator):
 
         return None
 
+    @property
+    def entry(self) -> config_entries.ConfigEntry:
+        """Return the config entry of the coordinator"""
+        return self._entry
+
     @property
     def user_data(self) -> FireflyiiiConfig:
         """Return User input config flow data"""
@@ -219,9 +261,121 @@ class FireflyiiiCoordinator(DataUpdateCoordinator):
 
         return self.data
 
+    def _refresh_plan(self) -> FireflyiiiRefreshPlan:
+        """
+        Fetches of a refresh and what each needs, shared values like the
+        default currency or the range totals are fetched once, first
+        """
+
+        user_data = self.user_data
+        api = self.api
+
+        plan = FireflyiiiRefreshPlan()
+        plan.add("about", api.about)
+        plan.add("default_currency", lambda: api.default_currency)
+        plan.add("start_year", lambda: api.start_year)
+        plan.add(
+            "preferences",
+            lambda *_: api.preferences(),
+            "default_currency",
+            "start_year",
+        )
+
+        # Totals of the range from one transactions download, instead of a
+        # request per account, category and budget
+        if user_data.get_accounts or user_data.get_categories or user_data.get_budgets:
+            plan.add("aggregation", self._refresh_aggregation)
+
+        if user_data.get_accounts:
+            plan.add(
+                "accounts",
+                lambda aggregation: api.accounts(
+                    types=user_data.account_types,
+                    ids=user_data.account_ids,
+                    aggregation=aggregation,
+                ),
+                "aggregation",
+            )
+
+        if user_data.get_categories:
+            plan.add(
+                "categories",
+                lambda aggregation, _: api.categories(
+                    ids=user_data.categories_ids, aggregation=aggregation
+                ),
+                "aggregation",
+                "default_currency",
+            )
+
+        if user_data.get_bills:
+            plan.add("bills", api.bills)
+
+        if user_data.get_piggy_banks:
+            if user_data.get_accounts:
+                plan.add(
+                    "piggy_banks",
+                    lambda accounts: api.piggy_banks(accounts=accounts),
+                    "accounts",
+                )
+            else:
+                plan.add("piggy_banks", api.piggy_banks)
+
+        if user_data.get_budgets:
+            plan.add(
+                "budgets",
+                lambda aggregation, _: api.budgets(aggregation=aggregation),
+                "aggregation",
+                "default_currency",
+            )
+
+        return plan
+
+    async def _refresh_aggregation(self) -> Optional[FireflyiiiAggregation]:
+        """
+        Totals of the range within their share of the refresh deadline, None
+        when they take longer so the accounts, categories and budgets still
+        refresh, from the server totals. After that the next refreshes don't
+        try them, instead of holding the dependent nodes up each time
+        """
+
+        if self._aggregation_skips > 0:
+            self._aggregation_skips -= 1
+            _LOGGER.debug(
+                "Skipping FireflyIII range totals, %s more refreshes",
+                self._aggregation_skips,
+            )
+            return None
+
+        remaining = self.api.deadline_remaining()
+        if remaining is None:
+            return await self.api.aggregation()
+
+        timeout = max(remaining * AGGREGATION_DEADLINE_SHARE, 0)
+        try:
+            return await asyncio.wait_for(self.api.aggregation(), timeout)
+        except TimeoutError:
+            self._aggregation_skips = AGGREGATION_SKIP_REFRESHES
+            _LOGGER.warning(
+                "FireflyIII range totals took over %.1f seconds, "
+                + "using server totals for the next %s refreshes",
+                timeout,
+                AGGREGATION_SKIP_REFRESHES,
+            )
+            return None
+
     async def _async_update_data(self):
         """Run coordinator update"""
 
+        # Requests of the refresh get what's left of the deadline as timeout,
+        # reset when the refresh ends so the next one doesn't inherit it
+        with self.api.request_deadline(
+            min(REFRESH_DEADLINE, self.interval).total_seconds()
+        ):
+            return await self._async_refresh_data()
+
+    async def _async_refresh_data(self):
+        """Runs the refresh plan, within the deadline of the refresh"""
+
         if not await self.api.check_connection():
             _LOGGER.warning("Skiping FireflyIII update, disconnected")
             return False
@@ -230,29 +384,42 @@ class FireflyiiiCoordinator(DataUpdateCoordinator):
 
         _LOGGER.debug("Updating FireflyIII sensors")
 
-        data_list = FireflyiiiObjectBaseList()
-
-        data_list.update(self.api.about())
-        data_list.update(self.api.preferences())
+        plan = self._refresh_plan()
+        remaining = self.api.deadline_remaining()
+        results = await plan.run(
+            timeout=None if remaining is None else max(remaining, 0)
+        )
+        self.last_refresh_plan = plan
+        plan.log_critical_path()
 
-        if self.user_data.get_accounts:
-            data_list.update(
-                self.api.accounts(
-                    types=self.user_data.account_types, ids=self.user_data.account_ids
-                )
+        if plan.cancelled:
+            _LOGGER.warning(
+                "FireflyIII refresh deadline passed, cancelled %s",
+                ", ".join(plan.cancelled),
             )
 
-        if self.user_data.get_categories:
-            data_list.update(self.api.categories(ids=self.user_data.categories_ids))
+        with self.api.blocking.section("build", len(results)):
+            return self._build_data(results, bool(plan.cancelled))
 
-        if self.user_data.get_bills:
-            data_list.update(self.api.bills())
+    def _build_data(
+        self, results: Dict[str, Any], partial: bool
+    ) -> FireflyiiiObjectBaseList:
+        """Coordinator data from the plan results"""
 
-        if self.user_data.get_piggy_banks:
-            data_list.update(self.api.piggy_banks())
+        data_list = FireflyiiiObjectBaseList()
+        for name in REFRESH_OUTPUTS:
+            data_list.update(results.get(name))
 
-        if self.user_data.get_budgets:
-            data_list.update(self.api.budgets())
+        # Slices not refreshed keep the data of the last refresh
+        if partial and isinstance(self.data, FireflyiiiObjectBaseList):
+            for key, value in self.data.data.items():
+                data_list.data.setdefault(key, value)
 
-        await data_list.gather()
+        data_list.build_index()
         return data_list
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Updates the listeners, the entities, timed as one section"""
+        with self.api.blocking.section("update listeners", len(self._listeners)):
+            super().async_update_listeners()
@@ -1,18 +1,31 @@
 """Useful functions"""
 
-from datetime import datetime
-from typing import Optional
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
 
-from babel import Locale, UnknownLocaleError
-from babel.numbers import LC_NUMERIC, format_currency
-from datetimerange import DateTimeRange
 from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
 
 from .fireflyiii_objects import FireflyiiiCurrency
 
+# babel and datetimerange are only imported when first used, loading babel
+# locale data at import time adds directly to Home Assistant boot time
+if TYPE_CHECKING:
+    from datetimerange import DateTimeRange
+
+# Compiled currency formats kept, one per currency, locale and decimal places
+CURRENCY_FORMATTERS_CACHE_SIZE = 128
+
 
 def get_locale(language: str, territory: Optional[str] = None) -> str:
     """Get The Locale"""
+
+    # pylint: disable=import-outside-toplevel
+    from babel import Locale, UnknownLocaleError
+
     try:
         locale = Locale(language, territory=territory)
     except UnknownLocaleError:
@@ -29,22 +42,75 @@ def get_hass_locale(hass: HomeAssistant) -> str:
     return get_locale(hass.config.language, territory=hass.config.country)
 
 
-def output_money(
-    value: float, currency: str | FireflyiiiCurrency, locale: str | None = LC_NUMERIC
-) -> str:
-    """Output Monetary Data With Unit"""
+@lru_cache(maxsize=CURRENCY_FORMATTERS_CACHE_SIZE)
+def currency_formatter(
+    currency: str, locale: str, decimal_places: Optional[int] = None
+) -> Callable[[float], str]:
+    """
+    Returns a formatter of amounts in the currency for the locale
+
+    The locale is parsed, its currency pattern compiled and the currency
+    symbol set in it once, as babel.numbers.format_currency does on every
+    call. Without decimal places the currency digits known to babel are used
+    """
+
+    # pylint: disable=import-outside-toplevel
+    from babel import Locale
+    from babel.numbers import get_currency_precision, get_currency_symbol, parse_pattern
+
+    babel_locale = Locale.parse(locale)
+
+    # A copy, the patterns of the locale are shared
+    pattern = parse_pattern(babel_locale.currency_formats["standard"].pattern)
+    if decimal_places is None:
+        decimal_places = get_currency_precision(currency)
+    pattern.frac_prec = (decimal_places, decimal_places)
+
+    # Quoted, as literal text of the pattern, so applying it doesn't look up
+    # the currency symbol and name again for each amount
+    symbol = "'" + get_currency_symbol(currency, babel_locale).replace("'", "''") + "'"
+
+    def with_symbol(texts: Tuple[str, str]) -> Tuple[str, str]:
+        """Positive and negative affixes with the symbol in place of ¤"""
+        positive, negative = texts
+        return positive.replace("\xa4", symbol), negative.replace("\xa4", symbol)
+
+    pattern.prefix = with_symbol(pattern.prefix)
+    pattern.suffix = with_symbol(pattern.suffix)
+
+    return partial(pattern.apply, locale=babel_locale, currency_digits=False)
+
+
+def _money_formatter(
+    currency: str | FireflyiiiCurrency, locale: str | None = None
+) -> Callable[[float], str]:
+    """Returns the formatter of the currency and locale"""
+
+    if not locale:
+        # pylint: disable=import-outside-toplevel
+        from babel.numbers import LC_NUMERIC
+
+        locale = LC_NUMERIC
 
     if isinstance(currency, FireflyiiiCurrency):
-        target_currency = str(currency)
-    else:
-        target_currency = currency
+        return currency_formatter(str(currency), locale, currency.decimal_places)
 
+    return currency_formatter(currency, locale)
+
+
+def _money_value(value: float) -> float:
+    """Amount as float, 0 when invalid"""
     try:
-        value = float(value)
+        return float(value)
     except ValueError:
-        value = 0
+        return 0
 
-    return format_currency(value, target_currency, locale=locale)
+
+def output_money(
+    value: float, currency: str | FireflyiiiCurrency, locale: str | None = None
+) -> str:
+    """Output Monetary Data With Unit"""
+    return _money_formatter(currency, locale)(_money_value(value))
 
 
 def dates_to_range(
@@ -52,6 +118,9 @@ def dates_to_range(
 ) -> DateTimeRange:
     """Returns Date Time Range"""
 
+    # pylint: disable=import-outside-toplevel
+    from datetimerange import DateTimeRange
+
     if not start_date:
         start_date = datetime.now()
 
@@ -63,3 +132,19 @@ def dates_to_range(
 
     timerange = DateTimeRange(start_date_timed, end_date_timed)
     return timerange
+
+
+def statistics_day_start(day: date) -> datetime:
+    """
+    Start of the statistics row of a local day, the first UTC hour in it
+
+    The recorder keeps rows at whole UTC hours, in time zones with a half
+    hour offset the day starts mid hour and its row at the next hour
+    """
+
+    start = dt_util.as_utc(dt_util.start_of_local_day(day))
+    hour = start.replace(minute=0, second=0, microsecond=0)
+    if hour < start:
+        hour += timedelta(hours=1)
+
+    return hour
@@ -0,0 +1,109 @@
+"""
+FireflyIII Integration Interval Cache
+
+Items by day, with the spans of days already fetched, so overlapping date
+ranges only fetch the days missing
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+from typing import Dict, Generic, Iterable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+ONE_DAY = timedelta(days=1)
+
+
+class FireflyiiiIntervalCache(Generic[T]):
+    """
+    Cache of items by day over covered date spans
+
+    Spans are kept sorted and merged when they overlap or touch, all dates are
+    inclusive
+    """
+
+    __slots__ = ("_spans", "_days", "_items")
+
+    def __init__(self) -> None:
+        self._spans: List[Tuple[date, date]] = []
+        self._days: List[date] = []
+        self._items: Dict[date, List[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def clear(self) -> None:
+        """Drops all the spans and items"""
+        self._spans = []
+        self._days = []
+        self._items = {}
+
+    def covered(self, day: date) -> bool:
+        """Is the day in a covered span"""
+        index = bisect_right(self._spans, (day, date.max))
+        return index > 0 and self._spans[index - 1][1] >= day
+
+    def missing(self, start: date, end: date) -> List[Tuple[date, date]]:
+        """Returns the sub-ranges of start to end that aren't covered"""
+
+        missing = []
+        cursor = start
+
+        for span_start, span_end in self._spans:
+            if span_end < cursor:
+                continue
+
+            if span_start > end:
+                break
+
+            if span_start > cursor:
+                missing.append((cursor, span_start - ONE_DAY))
+
+            cursor = span_end + ONE_DAY
+            if cursor > end:
+                return missing
+
+        if cursor <= end:
+            missing.append((cursor, end))
+
+        return missing
+
+    def add(self, start: date, end: date, items: Iterable[Tuple[date, T]]) -> None:
+        """
+        Adds the items fetched for start to end and marks the span covered
+
+        Items on days already covered, or out of the span, are ignored, so a
+        span fetched twice doesn't duplicate its items
+        """
+
+        for day, item in items:
+            if day < start or day > end or self.covered(day):
+                continue
+
+            if day not in self._items:
+                self._items[day] = []
+                insort(self._days, day)
+
+            self._items[day].append(item)
+
+        spans = []
+        for span_start, span_end in self._spans:
+            if span_end + ONE_DAY < start or span_start > end + ONE_DAY:
+                spans.append((span_start, span_end))
+            else:
+                start = min(start, span_start)
+                end = max(end, span_end)
+
+        insort(spans, (start, end))
+        self._spans = spans
+
+    def get(self, start: date, end: date) -> List[T]:
+        """Returns the items from start to end, ordered by day"""
+
+        items: List[T] = []
+        for day in self._days[
+            bisect_left(self._days, start) : bisect_right(self._days, end)
+        ]:
+            items.extend(self._items[day])
+
+        return items
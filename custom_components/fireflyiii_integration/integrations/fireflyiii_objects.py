@@ -4,15 +4,26 @@ FireflyIII Integration FireflyIII Agregation Classes
 Defines a base to the sensor data, helps adjustments if api changes
 """
 
-from asyncio import gather
 from collections import UserDict
-from collections.abc import Coroutine, ItemsView, ValuesView
+from collections.abc import ItemsView, Iterable, ValuesView
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import date, datetime, time
 from enum import EnumMeta, StrEnum
-from typing import ClassVar, Dict, List, Optional, Self, TypeAlias, Union, cast
+from typing import (
+    Any,
+    ClassVar,
+    Dict,
+    List,
+    Optional,
+    Self,
+    Tuple,
+    TypeAlias,
+    Union,
+    cast,
+)
 
 from .fireflyiii_exceptions import FireflyiiiObjectException
+from .fireflyiii_recurrence import pay_dates
 
 Object: TypeAlias = Union[
     Dict[str, "FireflyiiiObjectBaseId"],
@@ -51,11 +62,14 @@ class FireflyiiiObjectType(StrEnum, metaclass=FireflyiiiObjectTypeMeta):
         return self.value
 
 
-@dataclass
+# Objects are slotted, there's one instance per transaction, account, etc... and
+# a per instance __dict__ is the bulk of their memory. The ClassVar _objtype is
+# not a field, so it stays a plain class attribute shared by all instances
+@dataclass(slots=True)
 class FireflyiiiObjectBase:
     """FireflyIII Object Base"""
 
-    _objtype: ClassVar[FireflyiiiObjectType] = field(default=FireflyiiiObjectType.NONE)
+    _objtype: ClassVar[FireflyiiiObjectType] = FireflyiiiObjectType.NONE
 
     @property
     def objtype(self) -> FireflyiiiObjectType:
@@ -63,7 +77,7 @@ class FireflyiiiObjectBase:
         return self._objtype
 
 
-@dataclass
+@dataclass(slots=True)
 class FireflyiiiObjectBaseId(FireflyiiiObjectBase):
     """FireflyIII Object Base For Items With Id"""
 
@@ -73,8 +87,12 @@ class FireflyiiiObjectBaseId(FireflyiiiObjectBase):
 class FireflyiiiObjectBaseList(UserDict):
     """FireflyIII Special Object Holder Lists items by type"""
 
-    _coroutines: Optional[List[Coroutine]] = None
     _listtype: Optional[FireflyiiiObjectType] = None
+    _index: Optional["FireflyiiiObjectIndex"] = None
+
+    # When set every item added by extend_typed goes through __setitem__
+    # validation, meant to debug parsers, it's too slow for large lists
+    strict_validation: bool = False
 
     # pylint: disable=redefined-builtin
     def __init__(
@@ -84,6 +102,7 @@ class FireflyiiiObjectBaseList(UserDict):
     ):
         super().__init__(cast(UserDict, dict))
         self._listtype = type
+        self._index = None
 
     def values(self):
         "D.values() -> an object providing a view on D's values"
@@ -211,6 +230,44 @@ class FireflyiiiObjectBaseList(UserDict):
         else:
             self.data[key_str] = item
 
+    def extend_typed(
+        self: Self,
+        objtype: FireflyiiiObjectType,
+        iterable: Iterable["FireflyiiiObjectBaseId"],
+        strict: Optional[bool] = None,
+    ) -> None:
+        """Bulk insert of items with id of a single type
+
+        The container type is validated once, items are stored as they come
+        unless strict validation is requested
+        """
+
+        if strict is None:
+            strict = self.strict_validation
+
+        if strict:
+            for item in iterable:
+                self[objtype] = item
+            return
+
+        if not objtype or objtype not in FireflyiiiObjectType:
+            raise FireflyiiiObjectException(
+                f"FireflyiiiObjectBaseList can only append to key with valid type, tried {objtype}"
+            )
+
+        key_str = str(FireflyiiiObjectType[objtype])
+
+        container = self.data.get(key_str)
+        if container is None:
+            container = self.data[key_str] = {}
+        elif not isinstance(container, dict):
+            raise FireflyiiiObjectException(
+                f"FireflyiiiObjectBaseList can't extend {key_str}, it holds a single item"
+            )
+
+        for item in iterable:
+            container[item.id] = item
+
     def update(self, obj):  # pylint: disable=[arguments-differ]
         """Updates Dict"""
         if not obj:  # If its none ignore
@@ -219,40 +276,50 @@ class FireflyiiiObjectBaseList(UserDict):
             self[obj.objtype] = obj
         elif isinstance(
             obj, FireflyiiiObjectBaseList
-        ):  # If its a Base List Loop and add it
-            for tp, ob in obj.items():
-                if obj.list_type:
-                    tp = obj.list_type
+        ):  # If its a Base List add it, items were validated when first inserted
+            if obj.list_type:
+                self.extend_typed(obj.list_type, obj.values(), strict=False)
+                return
 
+            for tp, ob in obj.data.items():
                 if isinstance(
                     ob, FireflyiiiObjectBase
                 ):  # If the objetct is from base it's a item without id, add it
                     self[tp] = ob
                 else:
-                    for _, ob2 in ob.items():
-                        self[tp] = ob2
+                    self.extend_typed(tp, ob.values(), strict=False)
         elif isinstance(obj, list):  # If it's list loop and add it
             for ob in obj:
                 self.update(ob)
-        elif type(obj).__name__ == "coroutine":  # Store coroutines to await later
-            if not self._coroutines:
-                self._coroutines = []
-            self._coroutines.append(obj)
         else:
             raise FireflyiiiObjectException(
                 "FireflyiiiObjectBaseList can only append FireflyiiiObjectBase with type"
             )
 
-    async def gather(self):
-        """Gathers Coroutines"""
-        if not self._coroutines:
-            return
+    def lookup(
+        self, objtype: FireflyiiiObjectType, obj_id: str, default: Any = None
+    ) -> Any:
+        """Direct lookup of an item by type and id, without conversions"""
+        try:
+            return self.data[objtype][obj_id]
+        except (KeyError, TypeError):
+            return default
+
+    @property
+    def index(self) -> "FireflyiiiObjectIndex":
+        """Secondary indexes of the items, built on first use"""
+        if self._index is None:
+            self.build_index()
+
+        return cast(FireflyiiiObjectIndex, self._index)
 
-        result = await gather(*[res for res in self._coroutines])
-        self.update(result)
+    def build_index(self) -> "FireflyiiiObjectIndex":
+        """Builds the secondary indexes of the items"""
+        self._index = FireflyiiiObjectIndex(self)
+        return self._index
 
 
-@dataclass
+@dataclass(slots=True)
 class FireflyiiiCurrency(FireflyiiiObjectBaseId):
     """FireflyIII Currencies Data Agregation"""
 
@@ -274,7 +341,7 @@ class FireflyiiiCurrency(FireflyiiiObjectBaseId):
         return FireflyiiiCurrency(id="0", name="", code="")
 
 
-@dataclass
+@dataclass(slots=True)
 class FireflyiiiAbout(FireflyiiiObjectBase):
     """FireflyIII About Data Agregation"""
 
@@ -284,7 +351,7 @@ class FireflyiiiAbout(FireflyiiiObjectBase):
     version: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class FireflyiiiPreferences(FireflyiiiObjectBase):
     """FireflyIII Preferences Data Agregation"""
 
@@ -294,7 +361,7 @@ class FireflyiiiPreferences(FireflyiiiObjectBase):
     year_start: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class FireflyiiiAccount(FireflyiiiObjectBaseId):
     """FireflyIII Account Data Agregation"""
 
@@ -305,11 +372,13 @@ class FireflyiiiAccount(FireflyiiiObjectBaseId):
     currency: FireflyiiiCurrency
     balance: float = 0
     balance_beginning: float = 0
+    inflow: Optional[float] = None
+    outflow: Optional[float] = None
     iban: str = ""
     transactions: List["FireflyiiiTransaction"] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class FireflyiiiCategory(FireflyiiiObjectBaseId):
     """FireflyIII Category Data Agregation"""
 
@@ -323,7 +392,7 @@ class FireflyiiiCategory(FireflyiiiObjectBaseId):
     transactions: List["FireflyiiiTransaction"] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class FireflyiiiTransaction(FireflyiiiObjectBaseId):
     """FireflyIII Transaction Data Agregation"""
 
@@ -338,7 +407,7 @@ class FireflyiiiTransaction(FireflyiiiObjectBaseId):
     category: Optional[FireflyiiiCategory] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FireflyiiiBill(FireflyiiiObjectBaseId):
     """FireflyIII Bill Data Agregation"""
 
@@ -350,6 +419,31 @@ class FireflyiiiBill(FireflyiiiObjectBaseId):
     currency: FireflyiiiCurrency
     paid: List["FireflyiiiBillPayment"] = field(default_factory=list)
     pay: List["FireflyiiiBillPayment"] = field(default_factory=list)
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    repeat_freq: str = ""
+    skip: int = 0
+    active: bool = True
+
+    def expected_pay(self, start: date, end: date) -> List["FireflyiiiBillPayment"]:
+        """Expected payments from start to end, expanded from the recurrence"""
+
+        if not self.active or not self.start_date:
+            return []
+
+        return [
+            FireflyiiiBillPayment(
+                date=datetime.combine(day, time.min, tzinfo=self.start_date.tzinfo)
+            )
+            for day in pay_dates(
+                self.start_date.date(),
+                self.repeat_freq,
+                start,
+                end,
+                skip=self.skip,
+                end_date=self.end_date.date() if self.end_date else None,
+            )
+        ]
 
     @property
     def value(self) -> float:
@@ -368,7 +462,7 @@ class FireflyiiiBill(FireflyiiiObjectBaseId):
         return (value_min + value_max) / 2
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FireflyiiiBillPayment:
     """FireflyIII Bill Payment Data Agregation"""
 
@@ -395,7 +489,16 @@ class FireflyiiiBillPayment:
             return FireflyiiiCurrency.empty()
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class FireflyiiiBalanceHistory:
+    """FireflyIII Account Balance History Data Agregation"""
+
+    name: str
+    currency_code: str
+    balances: Tuple[Tuple[date, float], ...] = ()
+
+
+@dataclass(slots=True)
 class FireflyiiiPiggyBank(FireflyiiiObjectBaseId):
     """FireflyIII Piggy Bank Data Agregation"""
 
@@ -414,7 +517,7 @@ class FireflyiiiPiggyBank(FireflyiiiObjectBaseId):
     currency: Optional[FireflyiiiCurrency] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FireflyiiiBudget(FireflyiiiObjectBaseId):
     """FireflyIII Budget Data Agregation"""
 
@@ -426,3 +529,96 @@ class FireflyiiiBudget(FireflyiiiObjectBaseId):
     limit: float = 0
     limit_start: Optional[datetime] = None
     limit_end: Optional[datetime] = None
+
+
+class FireflyiiiObjectIndex:
+    """
+    FireflyIII Secondary Indexes
+
+    Built once from the refreshed data, lookups are dict reads returning
+    shared tuples
+    """
+
+    __slots__ = (
+        "_account_types",
+        "_currencies",
+        "_ibans",
+        "_names",
+        "_account_piggy_banks",
+        "_budget_limits",
+    )
+
+    _EMPTY: Tuple[str, ...] = ()
+
+    def __init__(self, objects: FireflyiiiObjectBaseList) -> None:
+        account_types: Dict[str, List[str]] = {}
+        currencies: Dict[Tuple[str, str], List[str]] = {}
+        account_piggy_banks: Dict[str, List[str]] = {}
+
+        self._ibans: Dict[str, str] = {}
+        self._names: Dict[Tuple[str, str], str] = {}
+        self._budget_limits: Dict[
+            str, Tuple[float, Optional[datetime], Optional[datetime]]
+        ] = {}
+
+        for objtype, container in objects.data.items():
+            if not isinstance(container, dict):
+                continue
+
+            objtype = str(objtype)
+
+            for obj_id, obj in container.items():
+                name = getattr(obj, "name", None)
+                if name:
+                    self._names[(objtype, name)] = obj_id
+
+                currency = getattr(obj, "currency", None)
+                if currency:
+                    currencies.setdefault((objtype, str(currency)), []).append(obj_id)
+
+                if isinstance(obj, FireflyiiiAccount):
+                    account_types.setdefault(obj.type, []).append(obj_id)
+                    if obj.iban:
+                        self._ibans[obj.iban] = obj_id
+                elif isinstance(obj, FireflyiiiPiggyBank) and obj.account:
+                    account_piggy_banks.setdefault(obj.account.id, []).append(obj_id)
+                elif isinstance(obj, FireflyiiiBudget):
+                    self._budget_limits[obj_id] = (
+                        obj.limit,
+                        obj.limit_start,
+                        obj.limit_end,
+                    )
+
+        self._account_types = {k: tuple(v) for k, v in account_types.items()}
+        self._currencies = {k: tuple(v) for k, v in currencies.items()}
+        self._account_piggy_banks = {
+            k: tuple(v) for k, v in account_piggy_banks.items()
+        }
+
+    def accounts_by_type(self, account_type: str) -> Tuple[str, ...]:
+        """Account ids of a account type"""
+        return self._account_types.get(account_type, self._EMPTY)
+
+    def by_currency(
+        self, objtype: FireflyiiiObjectType, currency: Union[str, FireflyiiiCurrency]
+    ) -> Tuple[str, ...]:
+        """Ids of the objects of a type in a currency"""
+        return self._currencies.get((str(objtype), str(currency)), self._EMPTY)
+
+    def account_by_iban(self, iban: str) -> Optional[str]:
+        """Account id with the IBAN"""
+        return self._ibans.get(iban)
+
+    def by_name(self, objtype: FireflyiiiObjectType, name: str) -> Optional[str]:
+        """Id of the object of a type with the name"""
+        return self._names.get((str(objtype), name))
+
+    def piggy_banks_by_account(self, account_id: str) -> Tuple[str, ...]:
+        """Piggy bank ids of an account"""
+        return self._account_piggy_banks.get(account_id, self._EMPTY)
+
+    def budget_limit(
+        self, budget_id: str
+    ) -> Optional[Tuple[float, Optional[datetime], Optional[datetime]]]:
+        """Budget limit amount, start and end"""
+        return self._budget_limits.get(budget_id)
@@ -0,0 +1,47 @@
+"""
+FireflyIII Integration Executor Offload
+
+Runs heavy parsing and aggregation in the executor once its input is large
+enough to block the event loop, small inputs cost less inline than the hand
+off to a thread
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Responses of this size or more are trimmed in the executor
+OFFLOAD_MIN_BYTES = 256 * 1024
+
+# Transaction tables of this many splits or more are aggregated in the executor
+OFFLOAD_MIN_ROWS = 20000
+
+
+def should_offload(size: int, threshold: Optional[int]) -> bool:
+    """Is the work on size big enough for the executor, None never offloads"""
+    return threshold is not None and size >= threshold
+
+
+async def offload(
+    func: Callable[..., T],
+    *args: Any,
+    size: int,
+    threshold: Optional[int],
+    executor: Optional[Executor] = None,
+) -> T:
+    """
+    Calls func with args, in the executor when size reaches the threshold
+
+    The function must not touch state shared with the loop, what it returns
+    is handed to the loop once done
+    """
+
+    if not should_offload(size, threshold):
+        return func(*args)
+
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, partial(func, *args)
+    )
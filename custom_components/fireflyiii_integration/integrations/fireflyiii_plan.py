@@ -0,0 +1,149 @@
+"""
+FireflyIII Integration Refresh Plan
+
+Runs the fetches of a refresh as a graph, each fetch starts as soon as the
+fetches it requires are done and gets their results
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class FireflyiiiPlanNode:
+    """A fetch of the plan, called with the results of the nodes it requires"""
+
+    name: str
+    fetch: Callable[..., Awaitable[Any]]
+    requires: Tuple[str, ...] = ()
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds the fetch ran, after its requirements were done"""
+        if self.started is None or self.finished is None:
+            return 0
+
+        return self.finished - self.started
+
+
+@dataclass(slots=True)
+class FireflyiiiRefreshPlan:
+    """
+    Graph of the fetches of a refresh
+
+    Nodes are added after the nodes they require, so the plan can't have
+    cycles. Independent nodes run concurrently and each result is shared
+    with all the nodes requiring it
+    """
+
+    nodes: Dict[str, FireflyiiiPlanNode] = field(default_factory=dict)
+    results: Dict[str, Any] = field(default_factory=dict)
+    cancelled: List[str] = field(default_factory=list)
+
+    def add(
+        self, name: str, fetch: Callable[..., Awaitable[Any]], *requires: str
+    ) -> None:
+        """Adds a node, its fetch is called with the results of requires"""
+
+        if name in self.nodes:
+            raise ValueError(f"Refresh plan already has a '{name}' node")
+
+        for required in requires:
+            if required not in self.nodes:
+                raise ValueError(
+                    f"Refresh plan node '{name}' requires unknown '{required}'"
+                )
+
+        self.nodes[name] = FireflyiiiPlanNode(name, fetch, requires)
+
+    async def _run_node(
+        self, node: FireflyiiiPlanNode, requires: List["asyncio.Future[Any]"]
+    ) -> Any:
+        """Waits for the required nodes and runs the fetch"""
+
+        # A required node failing or cancelled fails or cancels this one
+        required = await asyncio.gather(*requires)
+
+        loop = asyncio.get_running_loop()
+        node.started = loop.time()
+        try:
+            return await node.fetch(*required)
+        finally:
+            node.finished = loop.time()
+
+    async def run(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Runs the plan, returns the results by node
+
+        With a timeout the nodes still running when it ends, and the ones
+        waiting for them, are cancelled and left out of the results. The
+        error of a failed node is raised once all nodes are done
+        """
+
+        tasks: Dict[str, "asyncio.Future[Any]"] = {}
+        for name, node in self.nodes.items():
+            tasks[name] = asyncio.ensure_future(
+                self._run_node(node, [tasks[required] for required in node.requires])
+            )
+
+        if not tasks:
+            return self.results
+
+        _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        error: Optional[BaseException] = None
+        for name, task in tasks.items():
+            if task.cancelled():
+                self.cancelled.append(name)
+            elif task.exception() is not None:
+                error = error or task.exception()
+            else:
+                self.results[name] = task.result()
+
+        if error is not None:
+            raise error
+
+        return self.results
+
+    @property
+    def critical_path(self) -> List[FireflyiiiPlanNode]:
+        """
+        Chain of nodes that set the time of the refresh, from the last node
+        to finish back through the required node that finished last
+        """
+
+        finished = [node for node in self.nodes.values() if node.finished is not None]
+        if not finished:
+            return []
+
+        path = [max(finished, key=lambda node: node.finished or 0)]
+        while path[-1].requires:
+            required = [self.nodes[name] for name in path[-1].requires]
+            path.append(max(required, key=lambda node: node.finished or 0))
+
+        path.reverse()
+        return path
+
+    def log_critical_path(self) -> None:
+        """Logs the critical path at debug level"""
+
+        if not _LOGGER.isEnabledFor(logging.DEBUG):
+            return
+
+        _LOGGER.debug(
+            "FireflyIII refresh critical path: %s",
+            " > ".join(
+                f"{node.name} {node.duration:.2f}s" for node in self.critical_path
+            ),
+        )
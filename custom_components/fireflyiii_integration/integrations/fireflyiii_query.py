@@ -0,0 +1,118 @@
+"""
+FireflyIII Integration Query Builder
+
+Builds the requests of a filtered list, pushing each filter to the server
+where the endpoint supports it and keeping the rest to filter the items
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+@dataclass(slots=True, frozen=True)
+class FireflyiiiServerFilter:
+    """
+    Parameter an endpoint filters by. Without separator the parameter takes
+    one value, filtering by several values takes one request per value
+    """
+
+    param: str
+    separator: Optional[str] = None
+
+
+# Filters each list endpoint supports, by item attribute
+ACCOUNTS_FILTERS = {"type": FireflyiiiServerFilter("type")}
+TRANSACTIONS_FILTERS = {"type": FireflyiiiServerFilter("type")}
+AUTOCOMPLETE_ACCOUNTS_FILTERS = {"type": FireflyiiiServerFilter("types", ",")}
+
+# Account type names of FireflyIII, the autocomplete filters by these
+ACCOUNT_TYPE_NAMES = (
+    "Asset account",
+    "Beneficiary account",
+    "Cash account",
+    "Debt",
+    "Default account",
+    "Expense account",
+    "Import account",
+    "Initial balance account",
+    "Liability credit account",
+    "Loan",
+    "Mortgage",
+    "Reconciliation account",
+    "Revenue account",
+)
+
+
+def account_type_names(types: Iterable[str]) -> List[str]:
+    """Account type names containing any of the types, case insensitive"""
+    subs = [sub.lower() for sub in types]
+    return [name for name in ACCOUNT_TYPE_NAMES if any(s in name.lower() for s in subs)]
+
+
+class FireflyiiiQuery:
+    """
+    Filters of a list request
+
+    Filters the endpoint supports are sent as parameters, the others are
+    applied to the items of the response with matches
+    """
+
+    __slots__ = ("_params", "_server_filters", "_pushed", "_filters")
+
+    def __init__(
+        self,
+        params: Optional[Mapping[str, Any]] = None,
+        server_filters: Optional[Mapping[str, FireflyiiiServerFilter]] = None,
+    ) -> None:
+        self._params: Dict[str, Any] = dict(params) if params else {}
+        self._server_filters = server_filters or {}
+        self._pushed: List[Tuple[FireflyiiiServerFilter, Tuple[str, ...]]] = []
+        self._filters: Dict[str, frozenset] = {}
+
+    def where(self, field: str, values: Optional[Iterable[Any]]) -> "FireflyiiiQuery":
+        """Keeps the items with the field, id or attribute, in values"""
+
+        if not values:
+            return self
+
+        unique = tuple(dict.fromkeys(str(value) for value in values))
+
+        server_filter = self._server_filters.get(field)
+        if server_filter is None:
+            self._filters[field] = frozenset(unique)
+        else:
+            self._pushed.append((server_filter, unique))
+
+        return self
+
+    def requests(self) -> List[Dict[str, Any]]:
+        """Parameters of each request needed to get the filtered list"""
+
+        requests = [dict(self._params)]
+        for server_filter, values in self._pushed:
+            if server_filter.separator is not None:
+                value = server_filter.separator.join(values)
+                for params in requests:
+                    params[server_filter.param] = value
+            else:
+                requests = [
+                    {**params, server_filter.param: value}
+                    for params in requests
+                    for value in values
+                ]
+
+        return requests
+
+    def matches(self, item: Mapping[str, Any]) -> bool:
+        """Is the response item kept by the filters not sent to the server"""
+
+        for field, values in self._filters.items():
+            if field == "id":
+                value = item.get("id")
+            else:
+                value = (item.get("attributes") or {}).get(field)
+
+            if str(value) not in values:
+                return False
+
+        return True
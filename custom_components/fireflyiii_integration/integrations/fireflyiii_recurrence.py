@@ -0,0 +1,87 @@
+"""
+FireflyIII Integration Bill Recurrence
+
+Expands the expected pay dates of a bill locally, as FireflyIII does from the
+bill date, repeat frequency and skip
+"""
+
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import List, Optional
+
+# Length of each repeat frequency in months, weekly is handled in days
+REPEAT_MONTHS = {
+    "monthly": 1,
+    "quarterly": 3,
+    "half-year": 6,
+    "yearly": 12,
+}
+
+REPEAT_FREQUENCIES = ("weekly", *REPEAT_MONTHS)
+
+
+def add_months(day: date, months: int) -> date:
+    """Adds months to the day, without overflow to the next month"""
+
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+
+    return day.replace(
+        year=year, month=month, day=min(day.day, monthrange(year, month)[1])
+    )
+
+
+def pay_dates(
+    bill_date: date,
+    repeat_freq: str,
+    start: date,
+    end: date,
+    skip: int = 0,
+    end_date: Optional[date] = None,
+) -> List[date]:
+    """
+    Returns the expected pay dates of a bill from start to end, inclusive
+
+    Each date is counted from the bill date, occurrence n is the bill date
+    plus n times (skip + 1) periods, so month ends don't drift
+    """
+
+    if repeat_freq not in REPEAT_FREQUENCIES:
+        return []
+
+    if end_date and end_date < end:
+        end = end_date
+
+    first = max(start, bill_date)
+    if first > end:
+        return []
+
+    step = max(skip, 0) + 1
+
+    dates = []
+    if repeat_freq == "weekly":
+        period = timedelta(days=7 * step)
+        occurrence = -(-(first - bill_date).days // period.days)
+        current = bill_date + occurrence * period
+        while current <= end:
+            dates.append(current)
+            current += period
+
+        return dates
+
+    months = REPEAT_MONTHS[repeat_freq] * step
+    elapsed = (first.year - bill_date.year) * 12 + first.month - bill_date.month
+    occurrence = max(elapsed // months, 0)
+
+    current = add_months(bill_date, occurrence * months)
+    while current < first:
+        occurrence += 1
+        current = add_months(bill_date, occurrence * months)
+
+    while current <= end:
+        dates.append(current)
+        occurrence += 1
+        current = add_months(bill_date, occurrence * months)
+
+    return dates
@@ -0,0 +1,200 @@
+"""
+FireflyIII Integration Request Retries
+
+Retry policies with jittered exponential backoff and pacing from the rate
+limit headers sent by FireflyIII
+"""
+
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Iterator, Mapping, Optional
+
+# Statuses worth retrying, the server or a proxy is overloaded or restarting
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Rate limit window assumed when the server doesn't send the reset time
+RATE_LIMIT_WINDOW = 60
+
+# Requests are paced once the remaining quota is under this fraction
+RATE_LIMIT_LOW = 0.1
+
+# Longest pause waiting for the rate limit
+RATE_LIMIT_MAX_WAIT = 60
+
+# Loop time until which requests may be retried, set for each refresh
+REQUEST_DEADLINE: ContextVar[Optional[float]] = ContextVar(
+    "fireflyiii_request_deadline", default=None
+)
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, in seconds or HTTP date"""
+
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Requests made inside the block, and by the tasks created in it, aren't
+    retried past seconds from now. None runs the block without deadline
+    """
+    deadline = None
+    if seconds is not None:
+        deadline = asyncio.get_running_loop().time() + seconds
+
+    token = REQUEST_DEADLINE.set(deadline)
+    try:
+        yield
+    finally:
+        REQUEST_DEADLINE.reset(token)
+
+
+def deadline_remaining() -> Optional[float]:
+    """Seconds left before the deadline, None without deadline"""
+    deadline = REQUEST_DEADLINE.get()
+    if deadline is None:
+        return None
+
+    return deadline - asyncio.get_running_loop().time()
+
+
+def within_deadline(delay: float = 0) -> bool:
+    """Is there time before the deadline to wait the delay"""
+    deadline = REQUEST_DEADLINE.get()
+    return deadline is None or asyncio.get_running_loop().time() + delay < deadline
+
+
+@dataclass(slots=True, frozen=True)
+class FireflyiiiRetryPolicy:
+    """
+    Retry policy of a request class
+
+    The delay before retry n is random between 0 and backoff * 2 ** n, capped
+    to backoff_max, or how long the server asked to wait. A request the
+    server asks to wait longer than backoff_max for isn't retried
+    """
+
+    attempts: int = 1
+    backoff: float = 0.5
+    backoff_max: float = 10
+
+    def delay(
+        self, attempt: int, retry_after: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Seconds to wait before retrying after the attempt, from 0. None when
+        the server asked to wait longer than the policy allows
+        """
+        if retry_after is not None:
+            return retry_after if retry_after <= self.backoff_max else None
+
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2**attempt))
+
+
+# GETs are idempotent and retried, other methods are sent once
+RETRY_IDEMPOTENT = FireflyiiiRetryPolicy(attempts=3)
+RETRY_NONE = FireflyiiiRetryPolicy(attempts=1)
+
+
+class FireflyiiiRateLimit:
+    """
+    Rate limit quota from the X-RateLimit headers of the responses
+
+    When the remaining quota runs low requests are spread over what's left
+    of the window, instead of running into 429 responses. After a Retry-After
+    all the requests wait until the time the server asked for
+    """
+
+    __slots__ = ("limit", "remaining", "reset", "paused_until")
+
+    def __init__(self) -> None:
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset: Optional[float] = None
+        self.paused_until: Optional[float] = None
+
+    def pause(self, seconds: float) -> None:
+        """Holds the requests for the seconds the server asked to wait"""
+        until = time.time() + min(seconds, RATE_LIMIT_MAX_WAIT)
+        if self.paused_until is None or until > self.paused_until:
+            self.paused_until = until
+
+    def paused(self) -> float:
+        """Seconds left of the pause the server asked for"""
+
+        if self.paused_until is None:
+            return 0
+
+        remaining = self.paused_until - time.time()
+        if remaining <= 0:
+            self.paused_until = None
+            return 0
+
+        return remaining
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Reads the quota from the response headers"""
+
+        try:
+            self.limit = int(headers["X-RateLimit-Limit"])
+            self.remaining = int(headers["X-RateLimit-Remaining"])
+        except (KeyError, ValueError):
+            return
+
+        now = time.time()
+        try:
+            reset = float(headers["X-RateLimit-Reset"])
+            # Either a timestamp or seconds from now
+            self.reset = reset if reset > now / 2 else now + reset
+        except (KeyError, ValueError):
+            if self.reset is None or self.reset < now:
+                self.reset = now + RATE_LIMIT_WINDOW
+
+    def delay(self) -> float:
+        """Seconds to wait before the next request"""
+
+        paused = self.paused()
+        if paused > 0:
+            return paused
+
+        if self.limit is None or self.remaining is None or self.reset is None:
+            return 0
+
+        window = self.reset - time.time()
+        if window <= 0:
+            self.limit = self.remaining = self.reset = None
+            return 0
+
+        if self.remaining > max(self.limit * RATE_LIMIT_LOW, 1):
+            return 0
+
+        return min(window / (self.remaining + 1), RATE_LIMIT_MAX_WAIT)
+
+    async def wait(self) -> None:
+        """Waits the pace of the rate limit, as long as the deadline allows"""
+
+        delay = self.delay()
+
+        # Counted now, so requests sent meanwhile see the quota going down
+        if self.remaining:
+            self.remaining -= 1
+
+        if delay > 0 and within_deadline(delay):
+            await asyncio.sleep(delay)
@@ -0,0 +1,123 @@
+"""
+FireflyIII Integration Request Scheduler
+
+Shares a limit of concurrent requests to a FireflyIII server between its
+callers, with interactive requests served ahead of the background ones
+"""
+
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import AsyncIterator, Dict, Iterator, List, Tuple
+
+# Requests sent at the same time to one FireflyIII server
+REQUEST_CONCURRENCY = 4
+
+
+class FireflyiiiPriority(IntEnum):
+    """Priority classes of the requests, lower is served first"""
+
+    INTERACTIVE = 0
+    REFRESH = 1
+    BACKFILL = 2
+
+
+# Priority of the requests of the current task, and the tasks it creates
+REQUEST_PRIORITY: ContextVar[FireflyiiiPriority] = ContextVar(
+    "fireflyiii_request_priority", default=FireflyiiiPriority.REFRESH
+)
+
+
+@contextmanager
+def request_priority(priority: FireflyiiiPriority) -> Iterator[None]:
+    """Sends the requests made inside the block with the priority"""
+    token = REQUEST_PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        REQUEST_PRIORITY.reset(token)
+
+
+class FireflyiiiRequestScheduler:
+    """
+    Priority queue of the requests waiting for a free slot
+
+    Waiting requests are served by priority and then by arrival, so an
+    interactive request goes ahead of every queued refresh or backfill, and a
+    backfill only gets a slot when nothing else is waiting. Requests already
+    sent aren't interrupted
+    """
+
+    __slots__ = ("_limit", "_active", "_waiters", "_sequence")
+
+    def __init__(self, limit: int = REQUEST_CONCURRENCY) -> None:
+        self._limit = max(limit, 1)
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def active(self) -> int:
+        """Requests holding a slot"""
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        """Requests waiting for a slot"""
+        return sum(1 for *_, waiter in self._waiters if not waiter.done())
+
+    async def acquire(self) -> None:
+        """Waits for a free slot at the priority of the current task"""
+
+        if self._active < self._limit and not self.waiting:
+            self._active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters, (REQUEST_PRIORITY.get(), next(self._sequence), waiter)
+        )
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # The slot was handed over just before the cancel, pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Frees a slot, handing it to the first waiting request"""
+
+        while self._waiters:
+            *_, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Holds a slot for the block"""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+_SCHEDULERS: Dict[str, FireflyiiiRequestScheduler] = {}
+
+
+def request_scheduler(host: str) -> FireflyiiiRequestScheduler:
+    """Scheduler shared by all the api instances of a server"""
+
+    scheduler = _SCHEDULERS.get(host)
+    if scheduler is None:
+        scheduler = _SCHEDULERS[host] = FireflyiiiRequestScheduler()
+
+    return scheduler
@@ -0,0 +1,192 @@
+"""
+FireflyIII Integration Category Statistics
+
+Keeps a daily spend statistic per category in Home Assistant long term
+statistics, updated from the transactions of the last days only
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, cast
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from ..const import DOMAIN
+from .fireflyiii_coordinator import FireflyiiiCoordinator
+from .fireflyiii_functions import dates_to_range, statistics_day_start
+from .fireflyiii_objects import FireflyiiiCategory
+from .fireflyiii_retry import request_deadline
+from .fireflyiii_scheduler import FireflyiiiPriority, request_priority
+from .fireflyiii_store import FireflyiiiStore
+
+_LOGGER = logging.getLogger(__name__)
+
+# Days of statistics rewritten on each update, to catch late edits. Edits to
+# transactions older than this don't change the statistics
+STATISTICS_LATE_EDIT_DAYS = 7
+
+# Minimum time between statistics updates
+STATISTICS_UPDATE_INTERVAL = timedelta(hours=1)
+
+
+def category_statistic_id(entry_id: str, category_id: str) -> str:
+    """Statistic id of the daily spend of a category"""
+    return f"{DOMAIN}:{entry_id.lower()}_category_{category_id}"
+
+
+class FireflyiiiCategoryStatistics:
+    """
+    Daily spend statistics of the categories of a config entry
+
+    Each category has one row per day with the spent of the day as state and
+    the spent since the statistics began as sum. The store keeps the sum at
+    the start of the late edit window, so each update only downloads and
+    rewrites the days of the window
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator: FireflyiiiCoordinator):
+        self._hass = hass
+        self._coordinator = coordinator
+        self._entry_id = coordinator.entry.entry_id
+        self._store = FireflyiiiStore.get_store(
+            hass, f"category_statistics_{self._entry_id}"
+        )
+        self._task: Optional[asyncio.Task] = None
+        self._last_update: Optional[datetime] = None
+
+    @callback
+    def async_schedule_update(self) -> None:
+        """Coordinator listener, starts an update when one is due"""
+
+        if self._task is not None and not self._task.done():
+            return
+
+        if "recorder" not in self._hass.config.components:
+            return
+
+        now = dt_util.utcnow()
+        if self._last_update and now - self._last_update < STATISTICS_UPDATE_INTERVAL:
+            return
+
+        self._last_update = now
+        # Statistics yield the request slots to the refresh and the user, and
+        # don't take the deadline of the refresh that notified the listener
+        with request_priority(FireflyiiiPriority.BACKFILL), request_deadline(None):
+            self._task = self._hass.async_create_background_task(
+                self.async_update(),
+                f"{DOMAIN} category statistics {self._entry_id}",
+            )
+
+    def async_cancel(self) -> None:
+        """Cancels a running update"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def async_update(self) -> None:
+        """Rewrites the statistics of the days after the stored sums"""
+
+        # numpy is only loaded when a table is built
+        # pylint: disable=import-outside-toplevel
+        from .fireflyiii_table import FireflyiiiTransactionKind
+
+        api = self._coordinator.api
+        currency = await api.default_currency
+        today = dt_util.now().date()
+
+        state = await self._store.async_load() or {}
+        if state.get("currency") != str(currency):
+            state = {}
+
+        base_day = (
+            date.fromisoformat(state["base_day"])
+            if "base_day" in state
+            else today - timedelta(days=STATISTICS_LATE_EDIT_DAYS + 1)
+        )
+        base_sums: Dict[str, float] = state.get("sums", {})
+        first_day = base_day + timedelta(days=1)
+
+        # Only spending is kept, the server leaves out deposits and transfers
+        table = await api.transactions_table(
+            dates_to_range(
+                datetime.combine(first_day, time.min), datetime.combine(today, time.min)
+            ),
+            types=["withdrawal"],
+        )
+        if table is None:
+            return
+
+        withdrawals = table.date_mask(first_day, today) & table.kind_mask(
+            FireflyiiiTransactionKind.WITHDRAWAL
+        )
+
+        spent: Dict[str, Dict[date, float]] = {}
+        for (category_id, currency_code, day), total in table.daily_sum(
+            "category", withdrawals
+        ).items():
+            if currency_code == str(currency):
+                spent.setdefault(category_id, {})[day] = total
+
+        categories = cast(
+            Dict[str, FireflyiiiCategory], self._coordinator.api_data.categories
+        )
+        new_base_day = max(base_day, today - timedelta(days=STATISTICS_LATE_EDIT_DAYS))
+        new_sums: Dict[str, float] = {}
+
+        for category_id in set(categories) | set(spent) | set(base_sums):
+            running = base_sums.get(category_id, 0)
+            if new_base_day == base_day:
+                new_sums[category_id] = running
+
+            category_spent = spent.get(category_id, {})
+            rows: List[StatisticData] = []
+            day = first_day
+            while day <= today:
+                day_spent = category_spent.get(day, 0)
+                running += day_spent
+                rows.append(
+                    StatisticData(
+                        start=statistics_day_start(day),
+                        state=day_spent,
+                        sum=running,
+                    )
+                )
+
+                if day == new_base_day:
+                    new_sums[category_id] = running
+
+                day += timedelta(days=1)
+
+            category = categories.get(category_id)
+            name = category.name if category else category_id
+            statistic_id = category_statistic_id(self._entry_id, category_id)
+
+            async_add_external_statistics(
+                self._hass,
+                StatisticMetaData(
+                    has_mean=False,
+                    has_sum=True,
+                    name=f"{name} daily spent",
+                    source=DOMAIN,
+                    statistic_id=statistic_id,
+                    unit_of_measurement=str(currency),
+                ),
+                rows,
+            )
+
+        await self._store.async_save(
+            {
+                "currency": str(currency),
+                "base_day": new_base_day.isoformat(),
+                "sums": new_sums,
+            }
+        )
+
+        _LOGGER.debug(
+            "FireflyIII category statistics updated from %s to %s", first_day, today
+        )
@@ -0,0 +1,156 @@
+"""
+FireflyIII Integration JSON Stream
+
+Incremental decode of the items of a FireflyIII list response, items are
+handed over as soon as their last byte arrives
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, List
+
+_BEFORE_LIST = 0
+_IN_LIST = 1
+_AFTER_LIST = 2
+
+_BACKSLASH = ord("\\")
+_QUOTE = ord('"')
+_OPEN_OBJECT = ord("{")
+_OPEN_LIST = ord("[")
+
+
+class FireflyiiiJsonItemStream:
+    """
+    Incremental decoder of the objects in the top level data list
+
+    Only the bytes of the item being received are buffered, the rest of the
+    document (meta, links) is kept and decoded on close with an empty list
+    """
+
+    _STRUCTURE = re.compile(rb'["{}\[\]]')
+    _STRING = re.compile(rb'["\\]')
+
+    def __init__(
+        self, loads: Callable[[bytes], Any] = json.loads, key: str = "data"
+    ) -> None:
+        self._loads = loads
+        self._key = key.encode("utf-8")
+
+        self._buf = bytearray()
+        self._rest = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._state = _BEFORE_LIST
+        self._in_string = False
+        self._string_start = 0
+        self._last_string = b""
+        self._item_start = -1
+        self.items_count = 0
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Adds a chunk, returns the items completed by it"""
+
+        buf = self._buf
+        buf += chunk
+        pos = self._pos
+        items = []
+
+        while True:
+            if self._in_string:
+                match = self._STRING.search(buf, pos)
+                if not match:
+                    pos = len(buf)
+                    break
+
+                pos = match.start()
+                if buf[pos] == _BACKSLASH:
+                    if pos + 1 >= len(buf):
+                        break  # Wait for the escaped char
+                    pos += 2
+                    continue
+
+                self._in_string = False
+                if self._state == _BEFORE_LIST and self._depth == 1:
+                    self._last_string = bytes(buf[self._string_start + 1 : pos])
+                pos += 1
+                continue
+
+            match = self._STRUCTURE.search(buf, pos)
+            if not match:
+                pos = len(buf)
+                break
+
+            pos = match.start()
+            char = buf[pos]
+
+            if char == _QUOTE:
+                self._in_string = True
+                self._string_start = pos
+            elif char in (_OPEN_OBJECT, _OPEN_LIST):
+                if (
+                    self._state == _BEFORE_LIST
+                    and self._depth == 1
+                    and char == _OPEN_LIST
+                    and self._last_string == self._key
+                ):
+                    # Keep the document up to the list opening
+                    self._state = _IN_LIST
+                    self._rest += buf[: pos + 1]
+                    del buf[: pos + 1]
+                    pos = -1
+                elif self._state == _IN_LIST and self._depth == 2:
+                    self._item_start = pos
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._state == _IN_LIST:
+                    if self._depth == 2 and self._item_start >= 0:
+                        items.append(
+                            self._loads(bytes(buf[self._item_start : pos + 1]))
+                        )
+                        self.items_count += 1
+                        self._item_start = -1
+                        del buf[: pos + 1]
+                        pos = -1
+                    elif self._depth == 1:
+                        # Drop the separators, the list closing goes to the document
+                        self._state = _AFTER_LIST
+                        del buf[:pos]
+                        pos = 0
+
+            pos += 1
+
+        self._pos = self._trim(pos)
+        return items
+
+    def _trim(self, pos: int) -> int:
+        """Drops consumed bytes from the buffer, returns the new position"""
+
+        buf = self._buf
+
+        if self._state == _IN_LIST:
+            cut = self._item_start if self._item_start >= 0 else pos
+            if self._item_start >= 0:
+                self._item_start = 0
+        else:
+            cut = self._string_start if self._in_string else pos
+            self._rest += buf[:cut]
+            if self._in_string:
+                self._string_start = 0
+
+        del buf[:cut]
+        return pos - cut
+
+    def close(self) -> Dict[str, Any]:
+        """Ends the stream, returns the document without the list items"""
+
+        if self._state == _IN_LIST or self._in_string or self._depth:
+            raise ValueError("Incomplete JSON document")
+
+        self._rest += self._buf
+        self._buf = bytearray()
+
+        if not self._rest.strip():
+            return {}
+
+        return self._loads(bytes(self._rest))
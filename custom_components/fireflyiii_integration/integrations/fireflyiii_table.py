@@ -0,0 +1,308 @@
+"""
+FireflyIII Integration Transaction Table
+
+Columnar storage of transaction splits, used to aggregate large sets of
+transactions locally
+"""
+
+from array import array
+from collections.abc import Mapping
+from datetime import date, datetime
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+NO_CODE = -1
+
+
+class FireflyiiiTransactionKind(IntEnum):
+    """FireflyIII Transaction Types"""
+
+    WITHDRAWAL = 0
+    DEPOSIT = 1
+    TRANSFER = 2
+    OTHER = 3
+
+    @classmethod
+    def from_type(cls, transaction_type: str) -> "FireflyiiiTransactionKind":
+        """Returns the kind from the FireflyIII transaction type"""
+        return _KIND_TYPES.get(transaction_type.lower(), cls.OTHER)
+
+
+_KIND_TYPES = {
+    "withdrawal": FireflyiiiTransactionKind.WITHDRAWAL,
+    "deposit": FireflyiiiTransactionKind.DEPOSIT,
+    "transfer": FireflyiiiTransactionKind.TRANSFER,
+}
+
+
+def to_epoch_day(value: date) -> int:
+    """Days since 1970-01-01"""
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def from_epoch_day(value: int) -> date:
+    """Date from days since 1970-01-01"""
+    return date.fromordinal(int(value) + EPOCH_ORDINAL)
+
+
+class FireflyiiiCodes:
+    """Maps FireflyIII ids to dense integer codes"""
+
+    __slots__ = ("_codes", "_ids")
+
+    def __init__(self) -> None:
+        self._codes: Dict[str, int] = {}
+        self._ids: List[str] = []
+
+    def code(self, value: Any) -> int:
+        """Returns the code for the id, registering it if new"""
+        if value is None or value == "":
+            return NO_CODE
+
+        key = str(value)
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self._ids)
+            self._ids.append(key)
+
+        return code
+
+    def get(self, value: Any) -> int:
+        """Returns the code for the id without registering it"""
+        return self._codes.get(str(value), NO_CODE)
+
+    def id(self, code: int) -> str:
+        """Returns the id for a code"""
+        return self._ids[code]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class FireflyiiiTransactionTable:
+    """
+    FireflyIII transaction splits stored in contiguous columns
+
+    Amounts are kept as int64 in the minor unit of their currency, dates as
+    days since epoch and accounts, categories, budgets and currencies as int32
+    codes, so aggregations run vectorized over NumPy views of the columns
+    """
+
+    GROUPS = ("source", "destination", "category", "budget")
+
+    def __init__(self) -> None:
+        self._amount = array("q")
+        self._foreign_amount = array("q")
+        self._day = array("i")
+        self._kind = array("b")
+        self._source = array("i")
+        self._destination = array("i")
+        self._category = array("i")
+        self._budget = array("i")
+        self._currency = array("i")
+        self._foreign_currency = array("i")
+
+        self.accounts = FireflyiiiCodes()
+        self.categories = FireflyiiiCodes()
+        self.budgets = FireflyiiiCodes()
+        self.currencies = FireflyiiiCodes()
+
+        self._decimal_places: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._amount)
+
+    def _minor(self, value: Any, currency: int) -> int:
+        """Converts an amount to minor units of the currency"""
+        if currency == NO_CODE or value is None or value == "":
+            return 0
+
+        try:
+            amount = float(value)
+        except ValueError:
+            return 0
+
+        return round(amount * 10 ** self._decimal_places[currency])
+
+    def _currency_code(self, code: Optional[str], decimal_places: Any) -> int:
+        """Registers the currency and its decimal places"""
+        currency = self.currencies.code(code)
+        if currency != NO_CODE and currency not in self._decimal_places:
+            try:
+                self._decimal_places[currency] = int(decimal_places)
+            except (TypeError, ValueError):
+                self._decimal_places[currency] = 2
+
+        return currency
+
+    def append_split(self, split: Mapping[str, Any]) -> bool:
+        """Appends a FireflyIII transaction split, as in the API attributes"""
+
+        try:
+            split_date = datetime.fromisoformat(split.get("date", ""))
+        except (TypeError, ValueError):
+            return False
+
+        currency = self._currency_code(
+            split.get("currency_code"), split.get("currency_decimal_places", 2)
+        )
+        foreign_currency = self._currency_code(
+            split.get("foreign_currency_code"),
+            split.get("foreign_currency_decimal_places", 2),
+        )
+
+        self._amount.append(self._minor(split.get("amount"), currency))
+        self._foreign_amount.append(
+            self._minor(split.get("foreign_amount"), foreign_currency)
+        )
+        self._day.append(to_epoch_day(split_date.date()))
+        self._kind.append(FireflyiiiTransactionKind.from_type(split.get("type", "")))
+        self._source.append(self.accounts.code(split.get("source_id")))
+        self._destination.append(self.accounts.code(split.get("destination_id")))
+        self._category.append(self.categories.code(split.get("category_id")))
+        self._budget.append(self.budgets.code(split.get("budget_id")))
+        self._currency.append(currency)
+        self._foreign_currency.append(foreign_currency)
+
+        return True
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns a NumPy view, without copy, of a column"""
+        dtype = {"q": np.int64, "i": np.int32, "b": np.int8}
+        values = getattr(self, f"_{name}")
+        return np.frombuffer(values, dtype=dtype[values.typecode])
+
+    def decimal_places(self, currency_code: str) -> int:
+        """Decimal places of a currency in the table"""
+        return self._decimal_places.get(self.currencies.get(currency_code), 2)
+
+    def date_mask(
+        self, start: Optional[date] = None, end: Optional[date] = None
+    ) -> np.ndarray:
+        """Mask of the rows with date between start and end, inclusive"""
+        days = self.column("day")
+        mask = np.ones(len(days), dtype=bool)
+
+        if start:
+            mask &= days >= to_epoch_day(start)
+
+        if end:
+            mask &= days <= to_epoch_day(end)
+
+        return mask
+
+    def kind_mask(self, *kinds: FireflyiiiTransactionKind) -> np.ndarray:
+        """Mask of the rows with one of the transaction types"""
+        return np.isin(self.column("kind"), [int(kind) for kind in kinds])
+
+    def _group(self, by: str) -> FireflyiiiCodes:
+        """Ids of a group column"""
+        return {
+            "source": self.accounts,
+            "destination": self.accounts,
+            "category": self.categories,
+            "budget": self.budgets,
+        }[by]
+
+    def group_sum(
+        self,
+        by: str,
+        mask: Optional[np.ndarray] = None,
+        foreign: bool = False,
+    ) -> Dict[Tuple[str, str], float]:
+        """
+        Sums amounts grouped by a column and currency
+
+        Returns a dict keyed by (id, currency code) with the totals in the
+        currency major unit. With foreign, only rows with a foreign amount
+        are summed, in the foreign currency
+        """
+
+        if by not in self.GROUPS:
+            raise ValueError(f"Can't group transactions by '{by}'")
+
+        groups = self._group(by)
+
+        codes = self.column(by)
+        amounts = self.column("amount")
+        currencies = self.column("currency")
+
+        if foreign:
+            amounts = self.column("foreign_amount")
+            currencies = self.column("foreign_currency")
+
+        valid = (codes != NO_CODE) & (currencies != NO_CODE)
+        if mask is not None:
+            valid &= mask
+
+        n_currencies = max(len(self.currencies), 1)
+        keys = codes[valid].astype(np.int64) * n_currencies + currencies[valid]
+        size = max(len(groups), 1) * n_currencies
+
+        # float64 weights are exact for sums under 2**53 minor units
+        counts = np.bincount(keys, minlength=size)
+        sums = np.bincount(keys, weights=amounts[valid], minlength=size)
+
+        result: Dict[Tuple[str, str], float] = {}
+        for key in np.flatnonzero(counts):
+            group, currency = divmod(int(key), n_currencies)
+            scale = 10 ** self._decimal_places[currency]
+            result[(groups.id(group), self.currencies.id(currency))] = (
+                float(sums[key]) / scale
+            )
+
+        return result
+
+    def daily_sum(
+        self, by: str, mask: Optional[np.ndarray] = None
+    ) -> Dict[Tuple[str, str, date], float]:
+        """
+        Sums amounts grouped by a column, currency and day
+
+        Returns a dict keyed by (id, currency code, date) with the totals in
+        the currency major unit, only days with rows are in it
+        """
+
+        if by not in self.GROUPS:
+            raise ValueError(f"Can't group transactions by '{by}'")
+
+        groups = self._group(by)
+
+        codes = self.column(by)
+        currencies = self.column("currency")
+        days = self.column("day")
+
+        valid = (codes != NO_CODE) & (currencies != NO_CODE)
+        if mask is not None:
+            valid &= mask
+
+        if not valid.any():
+            return {}
+
+        first_day = int(days[valid].min())
+        n_days = int(days[valid].max()) - first_day + 1
+        n_currencies = max(len(self.currencies), 1)
+
+        keys = (
+            codes[valid].astype(np.int64) * n_currencies + currencies[valid]
+        ) * n_days + (days[valid] - first_day)
+
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        sums = np.bincount(inverse, weights=self.column("amount")[valid])
+
+        result: Dict[Tuple[str, str, date], float] = {}
+        for key, total in zip(unique_keys.tolist(), sums.tolist()):
+            group_currency, day = divmod(key, n_days)
+            group, currency = divmod(group_currency, n_currencies)
+            scale = 10 ** self._decimal_places[currency]
+            day_key = (
+                groups.id(group),
+                self.currencies.id(currency),
+                from_epoch_day(first_day + day),
+            )
+            result[day_key] = total / scale
+
+        return result
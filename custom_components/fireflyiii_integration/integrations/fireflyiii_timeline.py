@@ -0,0 +1,61 @@
+"""
+FireflyIII Integration Timeline
+
+Items sorted by day, built once and searched by bisection
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Generic, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class FireflyiiiTimeline(Generic[T]):
+    """
+    Sorted timeline of items over a span of days
+
+    The span, inclusive, is the range the items were fetched for, it can be
+    wider than the days of the items
+    """
+
+    __slots__ = ("_days", "_items", "start", "end")
+
+    def __init__(
+        self,
+        items: Iterable[Tuple[date, T]],
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> None:
+        ordered = sorted(items, key=lambda item: item[0])
+
+        self._days: List[date] = [day for day, _ in ordered]
+        self._items: List[T] = [item for _, item in ordered]
+        self.start = start
+        self.end = end
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def covers(self, start: date, end: date) -> bool:
+        """Is start to end inside the span of the timeline"""
+        return (
+            self.start is not None
+            and self.end is not None
+            and self.start <= start
+            and end <= self.end
+        )
+
+    def next(self, day: date) -> Optional[T]:
+        """Returns the first item on or after the day"""
+        index = bisect_left(self._days, day)
+        if index < len(self._items):
+            return self._items[index]
+
+        return None
+
+    def slice(self, start: date, end: date) -> List[T]:
+        """Returns the items from start to end, inclusive"""
+        return self._items[
+            bisect_left(self._days, start) : bisect_right(self._days, end)
+        ]
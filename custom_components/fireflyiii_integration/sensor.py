@@ -12,6 +12,7 @@ from homeassistant.components.sensor import SensorEntity
 from .const import (
     COORDINATOR,
     DOMAIN,
+    FIREFLYIII_ACCOUNT_FLOW_SENSOR_DESCRIPTIONS,
     FIREFLYIII_ACCOUNT_SENSOR_CONFIGS,
     FIREFLYIII_SENSOR_DESCRIPTIONS,
     STATE_UNAVAILABLE,
@@ -54,6 +55,13 @@ async def async_setup_entry(
         )
         accounts.append(obj)
 
+        for flow_description in FIREFLYIII_ACCOUNT_FLOW_SENSOR_DESCRIPTIONS.values():
+            accounts.append(
+                FireflyiiiAccountFlowSensorEntity(
+                    coordinator, flow_description, account_id
+                )
+            )
+
     categories = []
     for category_id in coordinator.api_data.categories:
         obj = FireflyiiiCategorySensorEntity(
@@ -103,7 +111,7 @@ class FireflyiiiAccountSensorEntity(FireflyiiiEntityBase, SensorEntity):
     def __init__(
         self,
         coordinator,
-        entity_description: SensorEntityDescription = None,
+        entity_description: Optional[SensorEntityDescription] = None,
         fireflyiii_id: Optional[str] = None,
     ):
         super().__init__(coordinator, entity_description, fireflyiii_id)
@@ -146,7 +154,7 @@ class FireflyiiiAccountSensorEntity(FireflyiiiEntityBase, SensorEntity):
         return self.entity_data.type
 
     @property
-    def native_value(self) -> float:
+    def native_value(self) -> Optional[float]:
         """Return the state of the sensor."""
         return self.entity_data.balance
 
@@ -161,6 +169,38 @@ class FireflyiiiAccountSensorEntity(FireflyiiiEntityBase, SensorEntity):
         return self.entity_data.balance - self.entity_data.balance_beginning
 
 
+class FireflyiiiAccountFlowSensorEntity(FireflyiiiAccountSensorEntity):
+    """
+    Firefly Account Inflow Or Outflow Sensor
+
+    The flows come from the totals of the range computed by the coordinator,
+    so these sensors don't add requests to the refresh
+    """
+
+    _attr_sources = ["account_type"]
+
+    def __init__(
+        self,
+        coordinator,
+        entity_description: Optional[SensorEntityDescription] = None,
+        fireflyiii_id: Optional[str] = None,
+    ):
+        super().__init__(coordinator, entity_description, fireflyiii_id)
+
+        self._attr_icon = self.entity_description.icon
+        self._attr_translation_key = self.entity_description.translation_key
+        self._attr_translation_placeholders = {"account_name": self.entity_data.name}
+
+    def gerenate_unique_id(self) -> str:
+        """Returns Unique Id for entity"""
+        return f"{super().gerenate_unique_id()}_{self.entity_description.key}"
+
+    @property
+    def native_value(self) -> Optional[float]:
+        """Return the state of the sensor."""
+        return getattr(self.entity_data, self.entity_description.key, None)
+
+
 class FireflyiiiCategorySensorEntity(FireflyiiiEntityBase, SensorEntity):
     """Firefly Category Sensor"""
 
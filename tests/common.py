@@ -0,0 +1,12 @@
+"""Helpers of the FireflyIII Integration tests"""
+
+import json
+from pathlib import Path
+from typing import Any
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_fixture(name: str) -> Any:
+    """Recorded FireflyIII api responses, keyed by path"""
+    return json.loads((FIXTURES / name).read_text(encoding="utf-8"))
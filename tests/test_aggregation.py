@@ -0,0 +1,121 @@
+"""Local aggregation against the totals FireflyIII reports"""
+
+from datetime import date
+from typing import Any, Dict, List
+
+import pytest
+
+from custom_components.fireflyiii_integration.integrations.fireflyiii_aggregation import (
+    FireflyiiiAggregation,
+)
+from custom_components.fireflyiii_integration.integrations.fireflyiii_objects import (
+    FireflyiiiCurrency,
+)
+from custom_components.fireflyiii_integration.integrations.fireflyiii_table import (
+    FireflyiiiTransactionTable,
+)
+
+from .common import load_fixture
+
+START = date(2024, 3, 1)
+END = date(2024, 3, 31)
+
+EUR = FireflyiiiCurrency(id="1", name="Euro", code="EUR", symbol="€")
+USD = FireflyiiiCurrency(id="2", name="US Dollar", code="USD", symbol="$")
+
+
+@pytest.fixture(name="responses")
+def fixture_responses() -> Dict[str, Any]:
+    """Recorded responses of a month with a cross currency transfer"""
+    return load_fixture("aggregation.json")
+
+
+@pytest.fixture(name="aggregation")
+def fixture_aggregation(responses: Dict[str, Any]) -> FireflyiiiAggregation:
+    """Aggregation of the recorded /transactions splits"""
+
+    table = FireflyiiiTransactionTable()
+    for transaction in responses["/transactions"]["data"]:
+        for split in transaction["attributes"]["transactions"]:
+            assert table.append_split(split)
+
+    return FireflyiiiAggregation.from_table(table, START, END)
+
+
+def server_sum(sums: List[Dict[str, Any]], currency: FireflyiiiCurrency) -> float:
+    """Total of the currency in a spent or earned list, as the api reads it"""
+    return sum(
+        float(item["sum"]) for item in sums if item["currency_code"] == str(currency)
+    )
+
+
+def test_transactions_count(aggregation: FireflyiiiAggregation) -> None:
+    """Every split in the range is counted, the last day included"""
+    assert aggregation.transactions_count == 8
+
+
+@pytest.mark.parametrize("currency", [EUR, USD])
+@pytest.mark.parametrize("category_id", ["1", "2", "3"])
+def test_category_totals(
+    responses: Dict[str, Any],
+    aggregation: FireflyiiiAggregation,
+    category_id: str,
+    currency: FireflyiiiCurrency,
+) -> None:
+    """Category spent and earned match /categories/{id}"""
+
+    attributes = responses[f"/categories/{category_id}"]["data"]["attributes"]
+
+    assert aggregation.category_spent_in(category_id, currency) == pytest.approx(
+        server_sum(attributes["spent"], currency)
+    )
+    assert aggregation.category_earned_in(category_id, currency) == pytest.approx(
+        server_sum(attributes["earned"], currency)
+    )
+
+
+@pytest.mark.parametrize("currency", [EUR, USD])
+def test_budget_totals(
+    responses: Dict[str, Any],
+    aggregation: FireflyiiiAggregation,
+    currency: FireflyiiiCurrency,
+) -> None:
+    """Budget spent matches /budgets"""
+
+    for budget in responses["/budgets"]["data"]:
+        assert aggregation.budget_spent_in(budget["id"], currency) == pytest.approx(
+            server_sum(budget["attributes"]["spent"], currency)
+        )
+
+
+def test_transfers_not_in_categories(aggregation: FireflyiiiAggregation) -> None:
+    """Transfers move money between own accounts, they aren't spent"""
+
+    assert sum(aggregation.category_spent.values()) == pytest.approx(-95.69)
+    assert sum(aggregation.budget_spent.values()) == pytest.approx(-95.69)
+
+
+def test_cross_currency_transfer(aggregation: FireflyiiiAggregation) -> None:
+    """Each side of the transfer moves in the currency of its account"""
+
+    assert aggregation.account_outflow_in("1", EUR) == pytest.approx(365.69)
+    assert aggregation.account_inflow_in("3", USD) == pytest.approx(108.50)
+    assert aggregation.account_outflow_in("3", USD) == pytest.approx(30.00)
+
+    assert aggregation.account_delta("1", EUR) == pytest.approx(2139.31)
+    assert aggregation.account_delta("2", EUR) == pytest.approx(200.00)
+    assert aggregation.account_delta("3", USD) == pytest.approx(78.50)
+
+
+def test_range_bounds(responses: Dict[str, Any]) -> None:
+    """Splits out of the range are left out"""
+
+    table = FireflyiiiTransactionTable()
+    for transaction in responses["/transactions"]["data"]:
+        for split in transaction["attributes"]["transactions"]:
+            table.append_split(split)
+
+    aggregation = FireflyiiiAggregation.from_table(table, START, date(2024, 3, 30))
+
+    assert aggregation.transactions_count == 7
+    assert aggregation.account_delta("2", EUR) == 0
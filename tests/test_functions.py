@@ -0,0 +1,79 @@
+"""Helpers of the FireflyIII Integration"""
+
+from datetime import date, datetime, timezone
+from typing import Iterator
+
+import pytest
+from babel.numbers import format_currency
+from homeassistant.util import dt as dt_util
+
+from custom_components.fireflyiii_integration.integrations.fireflyiii_functions import (
+    output_money,
+    statistics_day_start,
+)
+from custom_components.fireflyiii_integration.integrations.fireflyiii_objects import (
+    FireflyiiiCurrency,
+)
+
+
+@pytest.fixture(name="time_zone")
+def fixture_time_zone(request: pytest.FixtureRequest) -> Iterator[str]:
+    """Sets the Home Assistant time zone for the test"""
+
+    default = dt_util.get_default_time_zone()
+    dt_util.set_default_time_zone(dt_util.get_time_zone(request.param))
+    yield request.param
+    dt_util.set_default_time_zone(default)
+
+
+@pytest.mark.parametrize(
+    ("time_zone", "expected"),
+    [
+        ("UTC", datetime(2024, 3, 10, 0, tzinfo=timezone.utc)),
+        ("Europe/Lisbon", datetime(2024, 3, 10, 0, tzinfo=timezone.utc)),
+        ("America/New_York", datetime(2024, 3, 10, 5, tzinfo=timezone.utc)),
+        # Local midnight is 18:30 UTC, the row starts at the next whole hour
+        ("Asia/Kolkata", datetime(2024, 3, 9, 19, tzinfo=timezone.utc)),
+        ("Australia/Adelaide", datetime(2024, 3, 9, 14, tzinfo=timezone.utc)),
+    ],
+    indirect=["time_zone"],
+)
+def test_statistics_day_start(time_zone: str, expected: datetime) -> None:
+    """The row of a day starts at the first whole UTC hour of the local day"""
+
+    start = statistics_day_start(date(2024, 3, 10))
+
+    assert start == expected
+    assert start.minute == start.second == start.microsecond == 0
+    assert dt_util.as_local(start).date() == date(2024, 3, 10)
+
+
+@pytest.mark.parametrize(
+    ("decimal_places", "expected"),
+    [(0, "€1,235"), (2, "€1,234.57"), (3, "€1,234.568")],
+)
+def test_output_money_currency_decimal_places(
+    decimal_places: int, expected: str
+) -> None:
+    """FireflyIII currencies are rounded to their own decimal places"""
+
+    currency = FireflyiiiCurrency(
+        id="1", name="Euro", code="EUR", decimal_places=decimal_places
+    )
+    assert output_money(1234.5678, currency, "en_US") == expected
+
+
+@pytest.mark.parametrize("locale", ["en_US", "pt_PT", "de_CH", "ja_JP", "hi_IN"])
+@pytest.mark.parametrize("code", ["EUR", "USD", "JPY", "BHD"])
+def test_output_money_code_matches_babel(locale: str, code: str) -> None:
+    """Currency codes are rounded to the digits babel knows, as format_currency"""
+
+    for value in (0, 12.5, -1234567.891):
+        assert output_money(value, code, locale) == format_currency(
+            value, code, locale=locale
+        )
+
+
+def test_output_money_invalid_value() -> None:
+    """Amounts that aren't numbers are output as 0"""
+    assert output_money("not a number", "EUR", "en_US") == "€0.00"
@@ -0,0 +1,102 @@
+"""Import time budget of the FireflyIII Integration package"""
+
+import json
+import subprocess
+import sys
+from typing import Dict, List, Set, Tuple
+
+PACKAGE = "custom_components.fireflyiii_integration"
+
+# Modules of the package Home Assistant imports when setting it up
+PACKAGE_MODULES = (
+    PACKAGE,
+    f"{PACKAGE}.sensor",
+    f"{PACKAGE}.binary_sensor",
+    f"{PACKAGE}.calendar",
+)
+
+# Loaded by Home Assistant before any integration, left out of the measure
+HA_PRELOADED = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.device_registry",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.components.binary_sensor",
+    "homeassistant.components.calendar",
+    "homeassistant.components.sensor",
+)
+
+# Cumulative import time of the package modules, in microseconds
+IMPORT_TIME_BUDGET_US = 250_000
+
+# Heavy modules deferred to their first use
+DEFERRED_MODULES = (
+    "babel",
+    "numpy",
+    "datetimerange",
+    "homeassistant.components.recorder",
+    f"{PACKAGE}.integrations.fireflyiii_config_schema",
+    f"{PACKAGE}.integrations.fireflyiii_table",
+    f"{PACKAGE}.integrations.fireflyiii_backfill",
+    f"{PACKAGE}.integrations.fireflyiii_statistics",
+)
+
+IMPORT_SCRIPT = f"""
+import json, sys
+for module in {HA_PRELOADED!r}:
+    __import__(module)
+preloaded = set(sys.modules)
+for module in {PACKAGE_MODULES!r}:
+    __import__(module)
+print(json.dumps(sorted(set(sys.modules) - preloaded)))
+"""
+
+
+def _import_package() -> Tuple[Dict[str, int], Set[str]]:
+    """Imports the package in a new interpreter, with -X importtime"""
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    cumulative: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, total, name = line.split("|")
+        try:
+            cumulative[name.strip()] = int(total)
+        except ValueError:
+            continue  # The header
+
+    loaded: List[str] = json.loads(result.stdout.strip().splitlines()[-1])
+    return cumulative, set(loaded)
+
+
+def test_import_time_budget():
+    """The package imports within the budget"""
+
+    cumulative, _ = _import_package()
+
+    total = sum(cumulative.get(module, 0) for module in PACKAGE_MODULES)
+    assert total < IMPORT_TIME_BUDGET_US, (
+        f"Importing {PACKAGE} took {total} us, over the budget of "
+        f"{IMPORT_TIME_BUDGET_US} us"
+    )
+
+
+def test_heavy_modules_deferred():
+    """Importing the package doesn't load the heavy dependencies"""
+
+    _, loaded = _import_package()
+
+    eager = [
+        module
+        for module in DEFERRED_MODULES
+        if any(name == module or name.startswith(f"{module}.") for name in loaded)
+    ]
+    assert not eager, f"Imported at load time: {', '.join(eager)}"
@@ -0,0 +1,100 @@
+"""Bill pay dates expanded locally against the ones FireflyIII reports"""
+
+from datetime import date, datetime
+from typing import Any, Dict, List
+
+import pytest
+
+from custom_components.fireflyiii_integration.integrations.fireflyiii_recurrence import (
+    add_months,
+    pay_dates,
+)
+
+from .common import load_fixture
+
+# Range of the recorded /bills request
+START = date(2024, 1, 1)
+END = date(2025, 6, 30)
+
+BILLS: List[Dict[str, Any]] = load_fixture("bills.json")["/bills"]["data"]
+
+
+def _date(value: str) -> date:
+    """Day of an api timestamp"""
+    return datetime.fromisoformat(value).date()
+
+
+@pytest.mark.parametrize(
+    "bill", BILLS, ids=[bill["attributes"]["name"] for bill in BILLS]
+)
+def test_pay_dates_match_server(bill: Dict[str, Any]) -> None:
+    """Pay dates of the range match the pay_dates of /bills"""
+
+    attributes = bill["attributes"]
+    end_date = attributes["end_date"]
+
+    assert pay_dates(
+        _date(attributes["date"]),
+        attributes["repeat_freq"],
+        START,
+        END,
+        skip=attributes["skip"],
+        end_date=_date(end_date) if end_date else None,
+    ) == [_date(value) for value in attributes["pay_dates"]]
+
+
+def test_month_end_clamped_without_drift() -> None:
+    """A bill on the 31st pays on the last day of shorter months, then the 31st"""
+
+    assert pay_dates(date(2023, 1, 31), "monthly", date(2024, 2, 1), END)[:3] == [
+        date(2024, 2, 29),
+        date(2024, 3, 31),
+        date(2024, 4, 30),
+    ]
+
+
+def test_leap_day_yearly() -> None:
+    """A bill on February 29th pays on the 28th in common years"""
+
+    assert pay_dates(date(2020, 2, 29), "yearly", date(2021, 1, 1), END) == [
+        date(2021, 2, 28),
+        date(2022, 2, 28),
+        date(2023, 2, 28),
+        date(2024, 2, 29),
+        date(2025, 2, 28),
+    ]
+
+
+def test_end_date_inclusive() -> None:
+    """The bill pays on its end date, not after"""
+
+    dates = pay_dates(
+        date(2022, 5, 10), "monthly", START, END, end_date=date(2024, 6, 10)
+    )
+    assert dates[-1] == date(2024, 6, 10)
+
+    assert not pay_dates(
+        date(2022, 5, 10), "monthly", START, END, end_date=date(2023, 12, 31)
+    )
+
+
+def test_skip_counts_from_bill_date() -> None:
+    """Skipped periods are counted from the bill date, not from start"""
+
+    assert pay_dates(
+        date(2025, 4, 4), "weekly", date(2025, 4, 10), date(2025, 5, 2), skip=1
+    ) == [date(2025, 4, 18), date(2025, 5, 2)]
+
+
+@pytest.mark.parametrize("repeat_freq", ["", "daily", "unknown"])
+def test_unknown_frequency(repeat_freq: str) -> None:
+    """Frequencies FireflyIII doesn't have expand to no dates"""
+    assert not pay_dates(date(2024, 1, 1), repeat_freq, START, END)
+
+
+def test_add_months_clamps() -> None:
+    """Adding months keeps the day, clamped to the month length"""
+
+    assert add_months(date(2024, 1, 31), 1) == date(2024, 2, 29)
+    assert add_months(date(2024, 1, 31), 13) == date(2025, 2, 28)
+    assert add_months(date(2024, 12, 15), -12) == date(2023, 12, 15)
@@ -0,0 +1,186 @@
+"""Identical GETs running at the same time sharing one request"""
+
+import asyncio
+from typing import Any, List, Optional
+
+import pytest
+
+from custom_components.fireflyiii_integration.integrations.fireflyiii import Fireflyiii
+from custom_components.fireflyiii_integration.integrations.fireflyiii_retry import (
+    request_deadline,
+)
+from custom_components.fireflyiii_integration.integrations.fireflyiii_scheduler import (
+    FireflyiiiPriority,
+    request_priority,
+)
+
+
+class FakeFetch:
+    """Stands for the api request, answers once released"""
+
+    def __init__(self, error: Optional[Exception] = None) -> None:
+        self.calls: List[str] = []
+        self.released = asyncio.Event()
+        self._error = error
+
+    async def __call__(self, method: str, path: str, *args: Any) -> Any:
+        self.calls.append(path)
+        await self.released.wait()
+        if self._error is not None:
+            raise self._error
+
+        return {"data": [{"id": str(len(self.calls))}]}
+
+
+def api_with(fetch: FakeFetch, monkeypatch: pytest.MonkeyPatch) -> Fireflyiii:
+    """Api sending its requests to the fake fetch"""
+
+    api = Fireflyiii("http://firefly.test")
+    monkeypatch.setattr(api, "_request_api_fetch", fetch)
+    return api
+
+
+async def settle() -> None:
+    """Lets the started requests reach the fetch"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_waiters_share_one_fetch(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Every waiter gets the response of the single request sent"""
+
+    async def run() -> None:
+        fetch = FakeFetch()
+        api = api_with(fetch, monkeypatch)
+
+        waiters = [
+            asyncio.ensure_future(api._request_api("GET", "/accounts"))
+            for _ in range(3)
+        ]
+        await settle()
+        fetch.released.set()
+
+        results = await asyncio.gather(*waiters)
+
+        assert fetch.calls == ["/accounts"]
+        assert results == [{"data": [{"id": "1"}]}] * 3
+        assert api.stats.coalesced == 2
+        assert not api._inflight
+
+    asyncio.run(run())
+
+
+def test_waiters_share_the_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A failed request raises the same error in every waiter"""
+
+    async def run() -> None:
+        error = RuntimeError("server gone")
+        fetch = FakeFetch(error)
+        api = api_with(fetch, monkeypatch)
+
+        waiters = [
+            asyncio.ensure_future(api._request_api("GET", "/accounts"))
+            for _ in range(3)
+        ]
+        await settle()
+        fetch.released.set()
+
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert fetch.calls == ["/accounts"]
+        assert all(result is error for result in results)
+        assert not api._inflight
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_keeps_the_fetch(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Cancelling a waiter neither cancels the request nor leaves it behind"""
+
+    async def run() -> None:
+        fetch = FakeFetch()
+        api = api_with(fetch, monkeypatch)
+
+        first = asyncio.ensure_future(api._request_api("GET", "/accounts"))
+        second = asyncio.ensure_future(api._request_api("GET", "/accounts"))
+        await settle()
+
+        first.cancel()
+        await settle()
+        assert first.cancelled()
+        assert len(api._inflight) == 1
+
+        fetch.released.set()
+
+        assert await second == {"data": [{"id": "1"}]}
+        assert fetch.calls == ["/accounts"]
+        assert not api._inflight
+
+    asyncio.run(run())
+
+
+def test_cancelled_only_waiter_is_forgotten(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A request no one waits for anymore still finishes and is forgotten"""
+
+    async def run() -> None:
+        fetch = FakeFetch()
+        api = api_with(fetch, monkeypatch)
+
+        waiter = asyncio.ensure_future(api._request_api("GET", "/accounts"))
+        await settle()
+        waiter.cancel()
+        await settle()
+
+        inflight = next(iter(api._inflight.values()))
+        assert not inflight.future.cancelled()
+
+        fetch.released.set()
+        await inflight.future
+        await settle()
+
+        assert not api._inflight
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    ("priority", "deadline", "fetches"),
+    [
+        (FireflyiiiPriority.REFRESH, 5, 1),
+        (FireflyiiiPriority.BACKFILL, 1, 1),
+        (FireflyiiiPriority.INTERACTIVE, 5, 2),
+        (FireflyiiiPriority.REFRESH, 30, 2),
+        (FireflyiiiPriority.REFRESH, None, 2),
+    ],
+)
+def test_joiner_priority_and_deadline(
+    monkeypatch: pytest.MonkeyPatch,
+    priority: FireflyiiiPriority,
+    deadline: Optional[float],
+    fetches: int,
+) -> None:
+    """A more urgent or more patient caller doesn't wait for the request"""
+
+    async def request(
+        api: Fireflyiii, priority: FireflyiiiPriority, deadline: Optional[float]
+    ) -> Any:
+        with request_priority(priority), request_deadline(deadline):
+            return await api._request_api("GET", "/accounts")
+
+    async def run() -> None:
+        fetch = FakeFetch()
+        api = api_with(fetch, monkeypatch)
+
+        leader = asyncio.ensure_future(request(api, FireflyiiiPriority.REFRESH, 10))
+        await settle()
+        joiner = asyncio.ensure_future(request(api, priority, deadline))
+        await settle()
+
+        assert len(fetch.calls) == fetches
+
+        fetch.released.set()
+        await asyncio.gather(leader, joiner)
+
+        assert not api._inflight
+
+    asyncio.run(run())
@@ -0,0 +1,171 @@
+"""Retry policies and the pacing from the server rate limit"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import pytest
+
+from custom_components.fireflyiii_integration.integrations import fireflyiii_retry
+from custom_components.fireflyiii_integration.integrations.fireflyiii import (
+    Fireflyiii,
+    FireflyiiiStreamAttempt,
+)
+from custom_components.fireflyiii_integration.integrations.fireflyiii_retry import (
+    RATE_LIMIT_MAX_WAIT,
+    RETRY_IDEMPOTENT,
+    FireflyiiiRateLimit,
+    FireflyiiiRetryPolicy,
+)
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture(name="now")
+def fixture_now(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Fixed wall clock for the rate limit"""
+    monkeypatch.setattr(fireflyiii_retry.time, "time", lambda: NOW)
+
+
+@pytest.mark.parametrize(
+    ("retry_after", "delay"),
+    [(0, 0), (4, 4), (10, 10), (10.5, None), (3600, None)],
+)
+def test_policy_retry_after(retry_after: float, delay: Optional[float]) -> None:
+    """The wait the server asks for is kept, or not retried over the maximum"""
+    policy = FireflyiiiRetryPolicy(attempts=3, backoff_max=10)
+    assert policy.delay(0, retry_after) == delay
+
+
+@pytest.mark.parametrize("attempt", [0, 1, 2, 8])
+def test_policy_backoff(attempt: int) -> None:
+    """The backoff grows with the attempts, up to the maximum"""
+    policy = FireflyiiiRetryPolicy(attempts=3, backoff=0.5, backoff_max=10)
+    delay = policy.delay(attempt)
+    assert delay is not None
+    assert 0 <= delay <= min(10, 0.5 * 2**attempt)
+
+
+@pytest.mark.usefixtures("now")
+def test_pause_holds_every_request() -> None:
+    """A Retry-After delays the next requests, the longest pause wins"""
+
+    rate_limit = FireflyiiiRateLimit()
+    assert rate_limit.delay() == 0
+
+    rate_limit.pause(5)
+    rate_limit.pause(2)
+    assert rate_limit.paused() == 5
+    assert rate_limit.delay() == 5
+
+    rate_limit.pause(3600)
+    assert rate_limit.delay() == RATE_LIMIT_MAX_WAIT
+
+
+def test_pause_ends(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Requests go on once the pause is over"""
+
+    monkeypatch.setattr(fireflyiii_retry.time, "time", lambda: NOW)
+    rate_limit = FireflyiiiRateLimit()
+    rate_limit.pause(5)
+
+    monkeypatch.setattr(fireflyiii_retry.time, "time", lambda: NOW + 6)
+    assert rate_limit.paused() == 0
+    assert rate_limit.delay() == 0
+    assert rate_limit.paused_until is None
+
+
+@pytest.mark.usefixtures("now")
+def test_quota_pacing() -> None:
+    """A low quota spreads the requests over what's left of the window"""
+
+    rate_limit = FireflyiiiRateLimit()
+    rate_limit.update(
+        {
+            "X-RateLimit-Limit": "100",
+            "X-RateLimit-Remaining": "4",
+            "X-RateLimit-Reset": str(NOW + 30),
+        }
+    )
+    assert rate_limit.delay() == pytest.approx(6)
+
+    rate_limit.update({"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "50"})
+    assert rate_limit.delay() == 0
+
+
+class FakeStream:
+    """Stands for the streamed request, failing the first attempts"""
+
+    def __init__(self, failures: int, items_before_failure: int = 0) -> None:
+        self.attempts = 0
+        self._failures = failures
+        self._items_before_failure = items_before_failure
+
+    async def __call__(
+        self,
+        path: str,
+        params: Any,
+        response: Any,
+        timeout: Any,
+        outcome: FireflyiiiStreamAttempt,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        self.attempts += 1
+        if self.attempts <= self._failures:
+            for index in range(self._items_before_failure):
+                outcome.items += 1
+                yield {"id": f"partial-{index}"}
+
+            outcome.transient = True
+            return
+
+        for index in range(2):
+            outcome.items += 1
+            yield {"id": str(index)}
+
+
+def stream_items(
+    stream: FakeStream, monkeypatch: pytest.MonkeyPatch
+) -> Tuple[List[Dict[str, Any]], Fireflyiii]:
+    """Items the api yields from the fake stream, retried without waiting"""
+
+    async def run() -> Tuple[List[Dict[str, Any]], Fireflyiii]:
+        api = Fireflyiii("http://retry.test")
+        monkeypatch.setattr(api, "_request_api_stream", stream)
+        monkeypatch.setattr(fireflyiii_retry.random, "uniform", lambda a, b: 0)
+        return [item async for item in api._request_api_items("/transactions")], api
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize(("failures", "attempts"), [(0, 1), (1, 2), (2, 3)])
+def test_stream_retried(
+    monkeypatch: pytest.MonkeyPatch, failures: int, attempts: int
+) -> None:
+    """A list failing before its first item is requested again"""
+
+    stream = FakeStream(failures)
+    items, api = stream_items(stream, monkeypatch)
+
+    assert items == [{"id": "0"}, {"id": "1"}]
+    assert stream.attempts == attempts
+    assert api.stats.retries == failures
+
+
+def test_stream_retries_exhausted(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A list failing every attempt yields nothing"""
+
+    stream = FakeStream(failures=5)
+    items, _ = stream_items(stream, monkeypatch)
+
+    assert not items
+    assert stream.attempts == RETRY_IDEMPOTENT.attempts
+
+
+def test_stream_not_retried_after_items(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Once items have been yielded a failed list isn't requested again"""
+
+    stream = FakeStream(failures=1, items_before_failure=1)
+    items, api = stream_items(stream, monkeypatch)
+
+    assert items == [{"id": "partial-0"}]
+    assert stream.attempts == 1
+    assert api.stats.retries == 0